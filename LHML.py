@@ -1,5 +1,6 @@
 ﻿import clr
 import ctypes
+import functools
 import json
 import logging
 import os
@@ -7,22 +8,161 @@ import platform
 import psutil
 import re
 import sys
+import threading
 import time
 import winreg
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from app_config import DEFAULT_LHM_CONFIG
 from database import MariaDB
 from nv_api import NVMLHelper
 from typing import Optional, Tuple, List, Dict
 
-try:
-    import wmi as wmi_module
-except Exception:
-    wmi_module = None
+# 平台常量（进程内不变，模块加载时计算一次）
+_IS_WINDOWS = os.name == "nt"
+_SYSTEM_ROOT = os.environ.get("SystemRoot", r"C:\Windows")
+
+@functools.lru_cache(maxsize=1)
+def get_wmi_module():
+    """
+    延迟导入 wmi（会连带加载 pywin32 并初始化 COM），仅在首次真正使用 WMI 时执行；
+    非 Windows 或导入失败时返回 None（结果同样缓存），调用方无需再单独判断平台。
+    """
+    if not _IS_WINDOWS:
+        return None
+    try:
+        import wmi  # type: ignore
+        return wmi
+    except Exception:
+        return None
+
+# WMI 连接缓存：(线程 id, 命名空间) -> 连接。每次 wmi.WMI() 都是一次 COM 初始化 + 命名空间绑定，
+# 且 COM 对象不能跨线程使用，因此按线程分别缓存
+_WMI_CONN_CACHE: Dict[Tuple[int, str], object] = {}
+_WMI_COM_THREADS: set = set()
+
+def get_wmi_connection(namespace: str = "root\\cimv2"):
+    """
+    返回当前线程下指定命名空间的 WMI 连接（延迟创建并复用）；wmi 不可用时返回 None。
+    """
+    wmi = get_wmi_module()
+    if wmi is None:
+        return None
+    tid = threading.get_ident()
+    key = (tid, namespace.lower())
+    conn = _WMI_CONN_CACHE.get(key)
+    if conn is None:
+        # wmi 导入时只为主线程初始化 COM，其他线程首次使用前需自行初始化
+        if tid not in _WMI_COM_THREADS and threading.current_thread() is not threading.main_thread():
+            try:
+                import pythoncom  # type: ignore
+                pythoncom.CoInitialize()
+            except Exception:
+                pass
+        _WMI_COM_THREADS.add(tid)
+        conn = wmi.WMI(namespace=namespace)
+        _WMI_CONN_CACHE[key] = conn
+    return conn
+
+def drop_wmi_connection(namespace: str = "root\\cimv2") -> None:
+    """
+    连接失效（如 WMI 服务重启）时丢弃当前线程的缓存连接，下次调用重新连接。
+    """
+    _WMI_CONN_CACHE.pop((threading.get_ident(), namespace.lower()), None)
+
+# wbemFlagReturnImmediately | wbemFlagForwardOnly：流式返回、无回溯游标
+_WBEM_FLAGS_FAST = 0x10 | 0x20
+
+def wmi_query_rows(namespace: str, wql: str, props: Tuple[str, ...]) -> List[Tuple]:
+    """
+    以前向只读方式执行 WQL，仅取所需属性，返回 [(prop1, prop2, ...), ...]。
+    直接遍历底层 SWbemServices 结果，不为每行构造 wmi 包装对象；查询失败时丢弃缓存连接并抛出。
+    """
+    conn = get_wmi_connection(namespace)
+    if conn is None:
+        return []
+    try:
+        svc = getattr(conn, "_namespace", None)
+        rows = svc.ExecQuery(wql, "WQL", _WBEM_FLAGS_FAST) if svc is not None else conn.query(wql)
+        return [tuple(getattr(obj, p, None) for p in props) for obj in rows]
+    except Exception:
+        drop_wmi_connection(namespace)
+        raise
+
+def _wmi_get_props(namespace: str, rel_path: str, props: Tuple[str, ...]) -> Optional[Tuple]:
+    """
+    按对象相对路径（如 Win32_Fan.DeviceID="..."）直接取单个实例的属性，无需枚举整个类。
+    查询失败时丢弃缓存连接并抛出。
+    """
+    conn = get_wmi_connection(namespace)
+    if conn is None:
+        return None
+    try:
+        svc = getattr(conn, "_namespace", None)
+        obj = svc.Get(rel_path) if svc is not None else conn.get(rel_path)
+        return tuple(getattr(obj, p, None) for p in props)
+    except Exception:
+        drop_wmi_connection(namespace)
+        raise
+
+def _wmi_rel_path(item) -> Optional[str]:
+    # WMI 实例的相对对象路径（含类名与键属性），用于之后按键直接读取
+    try:
+        return _wmi_rel_path_of(item.Path_)
+    except Exception:
+        return None
+
+def _wmi_rel_path_of(path_obj) -> Optional[str]:
+    try:
+        return str(path_obj.RelPath) or None
+    except Exception:
+        return None
+
+def _persistable(sel: Optional[Dict]) -> Optional[Dict]:
+    # 去掉以下划线开头的运行期辅助字段（如 _name_l）后再写入配置
+    if not sel:
+        return sel
+    return {k: v for k, v in sel.items() if not k.startswith("_")}
+
+def _read_none() -> Optional[float]:
+    # 未选择/不可用来源的占位读取函数
+    return None
+
+_WQL_THERMAL_ZONE = "SELECT CurrentTemperature FROM MSAcpi_ThermalZoneTemperature"
+# Speed/DesiredSpeed 为 CIM_Fan 架构定义的属性，显式列出不会失败（提供程序未填充时返回 NULL）；
+# 键属性（DeviceID）与实例路径仍会随结果返回，序号换算路径时可用
+_WQL_FAN = "SELECT Speed, DesiredSpeed FROM Win32_Fan"
+
+# 预编译正则：版本号 / CUDA 路径中的版本段
+_SEMVER_RE = re.compile(r"(\d+(?:\.\d+){1,3})")
+_CUDA_PATH_RE = re.compile(r"[\\/]+v?(\d+(?:\.\d+){0,2})(?:[\\/]+|$)", re.IGNORECASE)
+
+def _parse_semver_from_text(txt: str) -> Optional[str]:
+    # 从任意字符串里解析类似 1.28 或 1.28.0 或 2.4.57.1 的版本号
+    m = _SEMVER_RE.search(txt or "")
+    return m.group(1) if m else None
+
+# 文件版本缓存：(path, mtime) -> 版本号；文件未变化时不再重复调用 WinAPI
+_FILE_VER_CACHE: Dict[Tuple[str, float], Optional[str]] = {}
+_FILE_VER_CACHE_MAX = 128
 
 def _get_file_version(path: str) -> Optional[str]:
     """
-    仅使用 WinAPI 读取文件版本（不执行外部命令）
+    仅使用 WinAPI 读取文件版本（不执行外部命令），按 (路径, 修改时间) 缓存结果
     """
+    try:
+        key = (path, os.path.getmtime(path))
+    except (OSError, TypeError, ValueError):
+        key = None
+    if key is not None and key in _FILE_VER_CACHE:
+        return _FILE_VER_CACHE[key]
+    ver = _read_file_version(path)
+    if key is not None:
+        if len(_FILE_VER_CACHE) >= _FILE_VER_CACHE_MAX:
+            _FILE_VER_CACHE.clear()
+        _FILE_VER_CACHE[key] = ver
+    return ver
+
+def _read_file_version(path: str) -> Optional[str]:
     try:
         path_w = ctypes.c_wchar_p(path)
         size = ctypes.windll.version.GetFileVersionInfoSizeW(path_w, None)
@@ -60,19 +200,31 @@ def _get_file_version(path: str) -> Optional[str]:
     except Exception:
         return None
 
+# Web 服务器目录下按顺序探测的可执行文件名
+_WEB_SERVER_EXE_NAMES = ("nginx.exe", "nginx", "httpd.exe", "httpd", "apache2.exe", "apache2", "w3wp.exe", "appcmd.exe")
+
 def _detect_web_server_from_path(path_hint: Optional[str]) -> Tuple[Optional[str], Optional[str], Optional[str]]:
     """
     仅通过路径推断类型 & 读取文件版本；不执行任何外部命令。
     """
     resolved = None
-    if path_hint:
-        p = os.path.expandvars(os.path.expanduser(path_hint))
+    p = os.path.expandvars(os.path.expanduser(path_hint)) if path_hint else None
+    if p:
         if os.path.isdir(p):
-            for candidate in ["nginx.exe", "nginx", "httpd.exe", "httpd", "apache2.exe", "apache2", "w3wp.exe", "appcmd.exe"]:
-                cand = os.path.join(p, candidate)
-                # 只接受真实文件，避免把同名目录误识别为可执行文件
-                if os.path.isfile(cand):
-                    resolved = cand
+            # 单次 scandir 收集候选文件，再按探测顺序取首个命中
+            found: Dict[str, str] = {}
+            try:
+                with os.scandir(p) as it:
+                    for e in it:
+                        nl = e.name.lower()
+                        # 只接受真实文件，避免把同名目录误识别为可执行文件
+                        if nl in _WEB_SERVER_EXE_NAMES and nl not in found and e.is_file():
+                            found[nl] = e.path
+            except OSError:
+                pass
+            for candidate in _WEB_SERVER_EXE_NAMES:
+                if candidate in found:
+                    resolved = found[candidate]
                     break
         elif os.path.isfile(p):
             resolved = p
@@ -80,11 +232,6 @@ def _detect_web_server_from_path(path_hint: Optional[str]) -> Tuple[Optional[str
     web_type: Optional[str] = None
     web_ver: Optional[str] = None
 
-    def _parse_semver_from_text(txt: str) -> Optional[str]:
-        # 从任意字符串里解析类似 1.28 或 1.28.0 或 2.4.57.1 的版本号
-        m = re.search(r"(\d+(?:\.\d+){1,3})", txt or "", re.IGNORECASE)
-        return m.group(1) if m else None
-
     if resolved:
         base = os.path.basename(resolved).lower()
         if "nginx" in base:
@@ -100,15 +247,19 @@ def _detect_web_server_from_path(path_hint: Optional[str]) -> Tuple[Optional[str
         # 回退：无法读取文件版本时，尝试从路径名/父目录名解析版本
         if web_type and not web_ver:
             try:
-                parent_name = os.path.basename(os.path.dirname(resolved))
-                web_ver = _parse_semver_from_text(parent_name) or _parse_semver_from_text(resolved)
+                # 对完整路径只扫描一次：优先父目录段内的命中，否则取路径中首个命中
+                parent_dir = os.path.dirname(resolved)
+                parent_start = len(os.path.dirname(parent_dir))
+                matches = list(_SEMVER_RE.finditer(resolved))
+                hit = next((m for m in matches if parent_start <= m.start() < len(parent_dir)),
+                           matches[0] if matches else None)
+                web_ver = hit.group(1) if hit else None
             except Exception:
                 pass
 
     # 目录名回退：未找到具体 exe，但目录名已能推断类型/版本
-    if (not web_type) and path_hint:
+    if (not web_type) and p:
         try:
-            p = os.path.expandvars(os.path.expanduser(path_hint))
             base_dir = os.path.basename(os.path.normpath(p)).lower()
             if "nginx" in base_dir:
                 web_type = "nginx"
@@ -120,51 +271,81 @@ def _detect_web_server_from_path(path_hint: Optional[str]) -> Tuple[Optional[str
             pass
 
     # IIS（可从注册表）
-    if not web_type and winreg is not None and platform.system().lower() == "windows":
-        try:
-            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Microsoft\InetStp") as k:
-                try:
-                    maj, _ = winreg.QueryValueEx(k, "MajorVersion")
-                    minv, _ = winreg.QueryValueEx(k, "MinorVersion")
-                    web_type = "IIS"
-                    web_ver = f"{int(maj)}.{int(minv)}"
-                except Exception:
-                    pass
-        except Exception:
-            pass
+    if not web_type:
+        iis = _read_iis_version_from_registry()
+        if iis:
+            web_type, web_ver = iis
 
     return web_type, web_ver, resolved
 
-def _read_java_version_from_registry() -> Optional[str]:
-    if winreg is None or platform.system().lower() != "windows":
+@functools.lru_cache(maxsize=1)
+def _read_iis_version_from_registry() -> Optional[Tuple[str, str]]:
+    if winreg is None or not _IS_WINDOWS:
         return None
     try:
-        with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\JavaSoft\Java Runtime Environment") as k:
-            ver, _ = winreg.QueryValueEx(k, "CurrentVersion")
-            if ver:
-                return f"java version \"{ver}\""
+        with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Microsoft\InetStp") as k:
+            try:
+                maj, _ = winreg.QueryValueEx(k, "MajorVersion")
+                minv, _ = winreg.QueryValueEx(k, "MinorVersion")
+                return "IIS", f"{int(maj)}.{int(minv)}"
+            except Exception:
+                pass
     except Exception:
         pass
     return None
 
+# 旧版 JRE 与 Java 9+ 的 JRE/JDK 注册表路径（按顺序探测，结果含未找到均缓存）
+_JAVASOFT_KEYS = (
+    r"SOFTWARE\JavaSoft\Java Runtime Environment",
+    r"SOFTWARE\JavaSoft\JRE",
+    r"SOFTWARE\JavaSoft\JDK",
+    r"SOFTWARE\JavaSoft\Java Development Kit",
+)
+
+@functools.lru_cache(maxsize=1)
+def _read_java_version_from_registry() -> Optional[str]:
+    if winreg is None or not _IS_WINDOWS:
+        return None
+    for key_path in _JAVASOFT_KEYS:
+        try:
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path) as k:
+                ver, _ = winreg.QueryValueEx(k, "CurrentVersion")
+                if ver:
+                    return f"java version \"{ver}\""
+        except Exception:
+            continue
+    return None
+
 
+@functools.lru_cache(maxsize=1)
 def _read_openssh_version_from_file() -> Optional[str]:
-    if platform.system().lower() != "windows":
+    if not _IS_WINDOWS:
         return None
-    root = os.environ.get("SystemRoot", r"C:\Windows")
-    ssh_path = os.path.join(root, "System32", "OpenSSH", "ssh.exe")
+    ssh_path = os.path.join(_SYSTEM_ROOT, "System32", "OpenSSH", "ssh.exe")
     if os.path.exists(ssh_path):
         ver = _get_file_version(ssh_path)
         if ver:
             return f"OpenSSH_{ver}"
     return None
 
+@functools.lru_cache(maxsize=1)
 def _read_python_version_from_env_or_runtime() -> str:
     v = (os.environ.get("PYTHON_VERSION") or "").strip()
     if v:
         return v
     return platform.python_version()
 
+def _clear_version_caches() -> None:
+    """
+    清空注册表/环境变量版本探测的进程级缓存（环境变量或安装发生变化后调用）
+    """
+    _read_iis_version_from_registry.cache_clear()
+    _read_java_version_from_registry.cache_clear()
+    _read_openssh_version_from_file.cache_clear()
+    _read_python_version_from_env_or_runtime.cache_clear()
+    _FILE_VER_CACHE.clear()
+    _CUDA_VER_CACHE.clear()
+
 
 def _read_java_version_from_env_or_registry() -> Optional[str]:
     v = (os.environ.get("JAVA_VERSION") or "").strip()
@@ -174,6 +355,7 @@ def _read_java_version_from_env_or_registry() -> Optional[str]:
     if home:
         cand = os.path.join(home, "bin", "java.exe")
         if os.path.exists(cand):
+            # JAVA_HOME 指向有效安装且能读到文件版本时以其为准；读不到则继续回退注册表 CurrentVersion
             fv = _get_file_version(cand)
             if fv:
                 return f'java version "{fv}"'
@@ -181,25 +363,68 @@ def _read_java_version_from_env_or_registry() -> Optional[str]:
     return _read_java_version_from_registry()
 
 
+def _walk_hardware(root) -> List:
+    """
+    先序展开硬件节点及其全部子硬件（显式栈，避免递归生成器开销）。
+    """
+    out: List = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        out.append(node)
+        try:
+            subs = list(node.SubHardware)
+        except Exception:
+            continue
+        # 逆序入栈，保持与递归遍历相同的先序顺序
+        stack.extend(reversed(subs))
+    return out
+
+
+def _sensor_ident(s) -> str:
+    # LHM Identifier -> 字符串（跨 pythonnet 边界，调用方应尽量缓存结果）
+    return s.Identifier.ToString() if hasattr(s.Identifier, "ToString") else str(s.Identifier)
+
+
 def _parse_cuda_version_from_path(p: str) -> Optional[str]:
     # 例: C:\Program Files\NVIDIA GPU Computing Toolkit\CUDA\v12.2 => 12.2
-    m = re.search(r"[\\/]+v?(\d+(?:\.\d+){0,2})(?:[\\/]+|$)", p, re.IGNORECASE)
+    m = _CUDA_PATH_RE.search(p)
     return m.group(1) if m else None
 
 
+# CUDA 版本解析结果缓存：(CUDA_VERSION, CUDA_PATH) -> 版本号
+_CUDA_VER_CACHE: Dict[Tuple[Optional[str], Optional[str]], Optional[str]] = {}
+
 def _read_cuda_version_from_env_or_nvml(nvml: NVMLHelper) -> Optional[str]:
+    key = (os.environ.get("CUDA_VERSION"), os.environ.get("CUDA_PATH"))
+    if key in _CUDA_VER_CACHE:
+        return _CUDA_VER_CACHE[key]
+    ver = _resolve_cuda_version(nvml)
+    _CUDA_VER_CACHE[key] = ver
+    return ver
+
+def _resolve_cuda_version(nvml: NVMLHelper) -> Optional[str]:
     v = (os.environ.get("CUDA_VERSION") or "").strip()
     if v:
         # 常见形式可能是 "12.2" 或 "12.2.0"
         m = re.search(r"(\d+(?:\.\d+){0,2})", v)
         return m.group(1) if m else v
-    # 查找最具体的 CUDA_PATH_V*，否则 CUDA_PATH
-    keys = sorted([k for k in os.environ.keys() if k.upper().startswith("CUDA_PATH_V")], reverse=True)
-    for k in keys + ["CUDA_PATH"]:
-        pathv = os.environ.get(k)
-        if not pathv:
+    # 查找最具体的 CUDA_PATH_V*（键名最大且可解析者），否则 CUDA_PATH；单次遍历，无需排序
+    best_key: Optional[str] = None
+    best_ver: Optional[str] = None
+    for k, pathv in os.environ.items():
+        if not pathv or not k.upper().startswith("CUDA_PATH_V"):
+            continue
+        if best_key is not None and k <= best_key:
             continue
         ver = _parse_cuda_version_from_path(pathv)
+        if ver:
+            best_key, best_ver = k, ver
+    if best_ver:
+        return best_ver
+    pathv = os.environ.get("CUDA_PATH")
+    if pathv:
+        ver = _parse_cuda_version_from_path(pathv)
         if ver:
             return ver
     # 最后回退 NVML 驱动支持版本
@@ -212,16 +437,29 @@ def _read_cuda_version_from_env_or_nvml(nvml: NVMLHelper) -> Optional[str]:
 class LibreHMReader:
     """
     LibreHardwareMonitorLib.dll 读取器（不启动外部进程）。
-    - 仅用相对路径尝试加载 DLL 名称（期望 DLL 与运行目录同级）；
-    - 首次运行会在当前工作目录输出 LibreHM.dump.txt（相对路径）。
+    - 仅用相对路径尝试加载 DLL 名称（期望 DLL 与运行目录同级）。
     """
-    def __init__(self, debug: bool = False) -> None:
+    def __init__(self, debug: bool = False, min_update_ms: int = 500) -> None:
         self.debug = debug
         self.ok = False
+        # 同一硬件节点两次 Update 的最小间隔（毫秒），轮询过快时复用上次刷新结果
+        self.min_update_ms = min_update_ms
         self._comp = None
         self._SensorType = None
         self._HardwareType = None
-        self._dumped = False  # 仅输出一次快照
+        # 关注的 HardwareType 枚举成员（未知 LHM 版本缺失时为空，回退字符串匹配）
+        self._GPU_TYPES: Tuple = ()
+        self._STORAGE_TYPES: Tuple = ()
+        self._NET_TYPES: Tuple = ()
+        self._index: Dict[str, List[Tuple]] = {}
+        self._hw_nodes: List = []  # 索引构建时记录的全部硬件节点（含子硬件，先序）
+        self._by_ident: Dict[str, Tuple] = {}  # Identifier 字符串 -> (hw, sensor)
+        # 每个采样周期统一刷新：begin_tick() 后同一节点只 Update 一次
+        self._tick_id = 0
+        self._updated_in_tick: set = set()
+        self._last_update: Dict[int, float] = {}  # id(hw) -> 上次 Update 的单调时钟（毫秒）
+        self._tick_values: Dict[str, Optional[float]] = {}  # 本周期已读取的传感器数值（Identifier -> float）
+        self._top_hw_cache: Optional[List] = None  # 顶层硬件列表（每周期最多枚举一次 CLR 集合）
         if clr is None:
             if self.debug:
                 logging.debug("pythonnet/clr 不可用，跳过 LibreHardwareMonitor")
@@ -237,8 +475,13 @@ class LibreHMReader:
             from LibreHardwareMonitor.Hardware import Computer, SensorType, HardwareType  # type: ignore
             self._SensorType = SensorType
             self._HardwareType = HardwareType
+            self._GPU_TYPES = tuple(getattr(HardwareType, n) for n in ("GpuNvidia", "GpuAmd", "GpuIntel") if hasattr(HardwareType, n))
+            self._STORAGE_TYPES = tuple(getattr(HardwareType, n) for n in ("Storage",) if hasattr(HardwareType, n))
+            self._NET_TYPES = tuple(getattr(HardwareType, n) for n in ("Network",) if hasattr(HardwareType, n))
 
             comp = Computer()
+            # 仅开启实际读取的子系统；PSU/电池未被使用，不再开启以缩小传感器树
+            # Controller 保留：CPU 风扇回退会读取其下的 Cooler 节点
             comp.IsCpuEnabled = True
             comp.IsMotherboardEnabled = True
             comp.IsControllerEnabled = True
@@ -246,15 +489,11 @@ class LibreHMReader:
             comp.IsGpuEnabled = True
             comp.IsStorageEnabled = True
             comp.IsNetworkEnabled = True
-            # 额外开启（有些环境下有助于加载底层驱动/节点）
-            try:
-                comp.IsPsuEnabled = True
-                comp.IsBatteryEnabled = True
-            except Exception:
-                pass
             comp.Open()
             self._comp = comp
             self.ok = True
+            # 一次性构建传感器索引，轮询时按分桶读取
+            self._build_index()
             # 启动自检：检查是否能看到 Nuvoton/EC 数值
             try:
                 self._post_open_diagnose()
@@ -275,81 +514,190 @@ class LibreHMReader:
         except Exception:
             pass
 
-    def _walk_collect(self, hw, indent: int, lines: List[str]) -> None:
-        ind = "  " * indent
-        try:
-            lines.append(f"{ind}HW [{hw.HardwareType}] '{hw.Name or ''}' id={hw.Identifier}")
-        except Exception:
-            pass
-        try:
-            for s in hw.Sensors:
-                try:
-                    val = s.Value if s.Value is not None else "None"
-                    vmin = s.Min if getattr(s, "Min", None) is not None else "None"
-                    vmax = s.Max if getattr(s, "Max", None) is not None else "None"
-                    lines.append(f"{ind}  - Sensor [{s.SensorType}] '{s.Name or ''}' id={s.Identifier} value={val} min={vmin} max={vmax}")
-                except Exception:
-                    continue
-        except Exception:
-            pass
+    def _ensure_updated(self, hw) -> None:
+        """
+        刷新单个硬件节点（不递归）。已调用 begin_tick() 时，同一周期内每个节点仅 Update 一次；
+        距上次刷新不足 min_update_ms 时同样跳过。
+        """
+        key = id(hw)
+        if self._tick_id and key in self._updated_in_tick:
+            return
+        now = time.monotonic() * 1000.0
+        last = self._last_update.get(key)
+        if last is not None and now - last < self.min_update_ms:
+            self._updated_in_tick.add(key)
+            return
         try:
-            for sub in hw.SubHardware:
-                self._walk_collect(sub, indent + 1, lines)
+            hw.Update()
         except Exception:
             pass
+        self._last_update[key] = now
+        self._updated_in_tick.add(key)
+
+    def begin_tick(self) -> None:
+        """
+        每个采样周期开始时调用一次：统一刷新所有硬件节点，之后各 getter 不再重复 Update。
+        """
+        if not (self.ok and self._comp):
+            return
+        self._tick_id += 1
+        self._updated_in_tick.clear()
+        self._tick_values.clear()
+        self._top_hw_cache = None
+        for hw in self._hw_nodes:
+            self._ensure_updated(hw)
+
+    def _top_hw(self) -> List:
+        """
+        返回顶层硬件列表；CLR 集合在每个周期内只枚举/封送一次。
+        """
+        if self._top_hw_cache is None:
+            self._top_hw_cache = list(self._comp.Hardware) if self._comp is not None else []
+        return self._top_hw_cache
 
     def debug_dump_once(self) -> None:
         """
-        在当前工作目录创建 LibreHM.dump.txt（相对路径）。
+        LibreHM.dump.txt 快照输出已禁用，仅保留函数接口。
         """
-        # 禁用 LibreHM.dump.txt 输出，但保留函数接口
         return
 
-        if self._dumped or (not self.ok) or (self._comp is None):
+    # ===== 传感器索引（打开时一次性构建，轮询时只遍历对应分桶） =====
+    _INDEX_KEYS = ("cpu_temp", "cpu_clock", "cpu_fan", "gpu_mem", "net_throughput", "storage_throughput")
+
+    # 名称匹配关键字（预编译为单次扫描的正则）
+    _CPU_FAN_RE = re.compile(r"cpu|aio|pump")
+    _CPU_TEMP_RE = re.compile(r"package|tctl|tdie|ccd|die")
+    _STORAGE_HWT_RE = re.compile(r"storage|hdd|nvme")
+    _STORAGE_NAME_RE = re.compile(r"nvme|hdd|ssd|wdc|st")
+
+    def _build_index(self) -> None:
+        """
+        遍历整棵硬件树（含子硬件）一次，将传感器按用途分桶：
+        {分类: [(hw, sensor, name_lower, sensor_type_lower, hardware_type_str, identifier_str), ...]}
+        """
+        index: Dict[str, List[Tuple]] = {k: [] for k in self._INDEX_KEYS}
+        nodes: List = []
+        by_ident: Dict[str, Tuple] = {}
+        self._index = index
+        self._hw_nodes = nodes
+        self._by_ident = by_ident
+        if not (self.ok and self._comp):
             return
+
+        HT = self._HardwareType
+        ST = self._SensorType
+        fan_hw_types = (HT.Motherboard, HT.SuperIO, HT.Cooler)
+        # 重建索引时重新枚举顶层硬件（热插拔后列表可能变化），旧节点的刷新时间一并丢弃
+        self._top_hw_cache = None
+        self._last_update.clear()
         try:
-            lines: List[str] = []
-            for hw in self._comp.Hardware:
-                self._update_recursive(hw)
-                self._walk_collect(hw, 0, lines)
-            with open("LibreHM.dump.txt", "w", encoding="utf-8") as f:
-                f.write("\n".join(lines))
-            logging.info("LibreHardwareMonitor 传感器快照已写入: LibreHM.dump.txt")
-        except Exception as e:
-            logging.debug(f"输出 LibreHM.dump.txt 失败：{e}")
-        finally:
-            self._dumped = True
+            for top in self._top_hw():
+                # 先刷新一次，部分传感器（如 SuperIO 风扇）在首次 Update 后才会出现
+                self._update_recursive(top)
+                for hw in _walk_hardware(top):
+                    nodes.append(hw)
+                    try:
+                        hw_type = hw.HardwareType
+                        hwt = str(hw_type)
+                        hwt_l = hwt.lower()
+                        hw_name_l = (hw.Name or "").lower()
+                        is_cpu = hw_type == HT.Cpu
+                        is_fan_hw = hw_type in fan_hw_types
+                        # 优先枚举比较；枚举成员缺失时回退字符串匹配
+                        is_gpu = hw_type in self._GPU_TYPES if self._GPU_TYPES else "Gpu" in hwt
+                        is_net = hw_type in self._NET_TYPES if self._NET_TYPES else hwt_l == "network"
+                        # Storage / HDD / NVMe 在不同版本里 HardwareType 可能不同，这里放宽匹配
+                        is_storage = (hw_type in self._STORAGE_TYPES) or \
+                            bool(self._STORAGE_HWT_RE.search(hwt_l) or self._STORAGE_NAME_RE.search(hw_name_l))
+                        sensors = list(hw.Sensors)
+                    except Exception:
+                        continue
+                    for s in sensors:
+                        try:
+                            name = (s.Name or "").lower()
+                            st = str(s.SensorType).lower()
+                            ident = _sensor_ident(s)
+                            by_ident[ident] = (hw, s)
+                            entry = (hw, s, name, st, hwt, ident)
+                            if is_cpu:
+                                if s.SensorType == ST.Temperature:
+                                    index["cpu_temp"].append(entry)
+                                elif st == "clock":
+                                    index["cpu_clock"].append(entry)
+                            # 主板/SuperIO/Cooler 单次匹配，名称过滤在建索引时完成
+                            if is_fan_hw and s.SensorType == ST.Fan and self._CPU_FAN_RE.search(name):
+                                index["cpu_fan"].append(entry)
+                            if is_gpu:
+                                if "smalldata" in ident.lower() or st == "smalldata":
+                                    index["gpu_mem"].append(entry)
+                            if st == "throughput":
+                                if is_net:
+                                    index["net_throughput"].append(entry)
+                                if is_storage:
+                                    index["storage_throughput"].append(entry)
+                        except Exception:
+                            continue
+        except Exception:
+            pass
+        if self.debug:
+            logging.debug("LHM 传感器索引: " + ", ".join(f"{k}={len(v)}" for k, v in index.items()))
+
+    def refresh_index(self) -> None:
+        """
+        硬件热插拔等导致枚举变化后，重建传感器索引。
+        """
+        self._build_index()
+
+    def sensor_by_ident(self, ident: str) -> Optional[Tuple]:
+        """
+        按 Identifier 字符串查找已索引的 (hw, sensor)，未找到返回 None。
+        """
+        return self._by_ident.get(ident)
+
+    def _sensor_value(self, s, ident: str) -> Optional[float]:
+        """
+        读取传感器数值（float，无效为 None）。begin_tick() 之后同一周期内按 Identifier 缓存，
+        各 getter 与 SensorSelector 重复读取同一传感器时只跨 CLR 取值一次。
+        """
+        if self._tick_id:
+            try:
+                return self._tick_values[ident]
+            except KeyError:
+                pass
+        v = s.Value
+        val: Optional[float] = None
+        if v is not None:
+            try:
+                val = float(v)
+            except (TypeError, ValueError):
+                val = None
+        if self._tick_id:
+            self._tick_values[ident] = val
+        return val
+
+    def _update_bucket(self, entries: List[Tuple]) -> None:
+        # 仅刷新分桶内涉及的硬件节点（去重；begin_tick 后本周期已刷新的节点跳过）
+        seen = set()
+        for hw, *_ in entries:
+            key = id(hw)
+            if key in seen:
+                continue
+            seen.add(key)
+            self._ensure_updated(hw)
 
     def cpu_fan_rpm(self) -> Optional[float]:
         if not self.ok or self._comp is None:
             return None
         candidates: List[float] = []
         try:
-            for hw in self._comp.Hardware:
-                if hw.HardwareType == self._HardwareType.Motherboard:
-                    self._update_recursive(hw)
-                    for s in hw.Sensors:
-                        if s.SensorType == self._SensorType.Fan:
-                            name = (s.Name or "").lower()
-                            if any(k in name for k in ("cpu", "aio", "pump")):
-                                try:
-                                    val = float(s.Value) if s.Value is not None else None
-                                    if val is not None and 1.0 <= val < 20000.0:
-                                        candidates.append(val)
-                                except Exception:
-                                    continue
-                if hw.HardwareType == self._HardwareType.SuperIO or hw.HardwareType == self._HardwareType.Cooler:
-                    self._update_recursive(hw)
-                    for s in hw.Sensors:
-                        if s.SensorType == self._SensorType.Fan:
-                            name = (s.Name or "").lower()
-                            if any(k in name for k in ("cpu", "aio", "pump")):
-                                try:
-                                    val = float(s.Value) if s.Value is not None else None
-                                    if val is not None and 1.0 <= val < 20000.0:
-                                        candidates.append(val)
-                                except Exception:
-                                    continue
+            entries = self._index.get("cpu_fan", [])
+            self._update_bucket(entries)
+            for hw, s, name, st, hwt, ident in entries:
+                val = self._sensor_value(s, ident)
+                if val is None:
+                    continue
+                if 1.0 <= val < 20000.0:
+                    candidates.append(val)
         except Exception:
             pass
         return max(candidates) if candidates else None
@@ -369,35 +717,24 @@ class LibreHMReader:
         total = 0.0
         has_any = False
         try:
-            for hw in self._comp.Hardware:
-                hwt = str(hw.HardwareType)
-                if "Gpu" not in hwt:
+            entries = self._index.get("gpu_mem", [])
+            self._update_bucket(entries)
+
+            # 按 GPU 节点分组：id(hw) -> [used, total, d3d_dedicated]
+            per_hw: Dict[int, List[Optional[float]]] = {}
+            for hw, s, name, st, hwt, ident in entries:
+                v = self._sensor_value(s, ident)
+                if v is None:
                     continue
-                self._update_recursive(hw)
-
-                u_local = None
-                t_local = None
-                d3d_ded_local = None
-
-                for s in hw.Sensors:
-                    try:
-                        st = str(s.SensorType).lower()
-                        name = (s.Name or "").lower()
-                        ident = s.Identifier.ToString().lower() if hasattr(s.Identifier, "ToString") else str(s.Identifier).lower()
-
-                        if "smalldata" in ident or st == "smalldata":
-                            v = float(s.Value) if s.Value is not None else None
-                            if v is None:
-                                continue
-                            if "gpu memory used" in name:
-                                u_local = v
-                            elif "gpu memory total" in name:
-                                t_local = v
-                            elif "d3d dedicated memory used" in name:
-                                d3d_ded_local = v
-                    except Exception:
-                        continue
-
+                slot = per_hw.setdefault(id(hw), [None, None, None])
+                if "gpu memory used" in name:
+                    slot[0] = v
+                elif "gpu memory total" in name:
+                    slot[1] = v
+                elif "d3d dedicated memory used" in name:
+                    slot[2] = v
+
+            for u_local, t_local, d3d_ded_local in per_hw.values():
                 # LHM 显存单位通常为 MB
                 if u_local is None and d3d_ded_local is not None:
                     u_local = d3d_ded_local
@@ -423,21 +760,17 @@ class LibreHMReader:
             return None
         vals: List[float] = []
         try:
-            for hw in self._comp.Hardware:
-                if hw.HardwareType == self._HardwareType.Cpu:
-                    self._update_recursive(hw)
-                    for s in hw.Sensors:
-                        try:
-                            if str(s.SensorType).lower() == "clock":
-                                nm = (s.Name or "").lower()
-                                # LHM 报表示例：Core #1 (Effective)/Core #2 (Effective)...
-                                if "effective" in nm or nm.startswith("core #"):
-                                    if s.Value is not None:
-                                        v = float(s.Value)
-                                        if v > 0:
-                                            vals.append(v)
-                        except Exception:
-                            continue
+            entries = self._index.get("cpu_clock", [])
+            self._update_bucket(entries)
+            for hw, s, nm, st, hwt, ident in entries:
+                # LHM 报表示例：Core #1 (Effective)/Core #2 (Effective)...
+                if not ("effective" in nm or nm.startswith("core #")):
+                    continue
+                v = self._sensor_value(s, ident)
+                if v is None:
+                    continue
+                if v > 0:
+                    vals.append(v)
         except Exception:
             pass
         if vals:
@@ -452,20 +785,17 @@ class LibreHMReader:
             return None
         try:
             candidates: List[float] = []
-            for hw in self._comp.Hardware:
-                if hw.HardwareType == self._HardwareType.Cpu:
-                    self._update_recursive(hw)
-                    for s in hw.Sensors:
-                        if s.SensorType == self._SensorType.Temperature:
-                            name = (s.Name or "").lower()
-                            if any(k in name for k in ("package", "tctl", "tdie", "ccd", "die")):
-                                try:
-                                    val = float(s.Value) if s.Value is not None else None
-                                    # 仅 CPU 节点内做基本合理性校验
-                                    if val is not None and 0.0 <= val < 120.0:
-                                        candidates.append(val)
-                                except Exception:
-                                    continue
+            entries = self._index.get("cpu_temp", [])
+            self._update_bucket(entries)
+            for hw, s, name, st, hwt, ident in entries:
+                if not self._CPU_TEMP_RE.search(name):
+                    continue
+                val = self._sensor_value(s, ident)
+                if val is None:
+                    continue
+                # 仅 CPU 节点内做基本合理性校验
+                if 0.0 <= val < 120.0:
+                    candidates.append(val)
             if candidates:
                 return max(candidates)
         except Exception:
@@ -483,25 +813,22 @@ class LibreHMReader:
         down_bytes = 0.0
         has_any = False
         try:
-            for hw in self._comp.Hardware:
-                if str(hw.HardwareType).lower() != "network":
+            entries = self._index.get("net_throughput", [])
+            self._update_bucket(entries)
+            # 按网卡节点分组：id(hw) -> [upload, download]
+            per_hw: Dict[int, List[float]] = {}
+            for hw, s, name, st, hwt, ident in entries:
+                slot = per_hw.setdefault(id(hw), [0.0, 0.0])
+                if "upload" in name:
+                    pos = 0
+                elif "download" in name:
+                    pos = 1
+                else:
                     continue
-                self._update_recursive(hw)
-                u_local = 0.0
-                d_local = 0.0
-                for s in hw.Sensors:
-                    try:
-                        st = str(s.SensorType)
-                        name = (s.Name or "").lower()
-                        if st.lower() == "throughput":
-                            if "upload" in name:
-                                if s.Value is not None:
-                                    u_local += float(s.Value)
-                            elif "download" in name:
-                                if s.Value is not None:
-                                    d_local += float(s.Value)
-                    except Exception:
-                        continue
+                v = self._sensor_value(s, ident)
+                if v is not None:
+                    slot[pos] += v
+            for u_local, d_local in per_hw.values():
                 if u_local > 0 or d_local > 0:
                     has_any = True
                     up_bytes += u_local
@@ -523,28 +850,22 @@ class LibreHMReader:
         w_bytes = 0.0
         has_any = False
         try:
-            for hw in self._comp.Hardware:
-                # Storage / HDD / NVMe 在不同版本里 HardwareType 可能不同，这里放宽匹配
-                hwt = str(hw.HardwareType).lower()
-                if not any(k in hwt for k in ("storage", "hdd", "nvme")):
-                    if not any(tag in (hw.Name or "").lower() for tag in ("nvme", "hdd", "ssd", "wdc", "st")):
-                        continue
-                self._update_recursive(hw)
-                r_local = 0.0
-                w_local = 0.0
-                for s in hw.Sensors:
-                    try:
-                        st = str(s.SensorType).lower()
-                        name = (s.Name or "").lower()
-                        if st == "throughput":
-                            if "read rate" in name or ("read" in name and "rate" in name):
-                                if s.Value is not None:
-                                    r_local += float(s.Value)
-                            elif "write rate" in name or ("write" in name and "rate" in name):
-                                if s.Value is not None:
-                                    w_local += float(s.Value)
-                    except Exception:
-                        continue
+            entries = self._index.get("storage_throughput", [])
+            self._update_bucket(entries)
+            # 按磁盘节点分组：id(hw) -> [read, write]
+            per_hw: Dict[int, List[float]] = {}
+            for hw, s, name, st, hwt, ident in entries:
+                slot = per_hw.setdefault(id(hw), [0.0, 0.0])
+                if "read rate" in name or ("read" in name and "rate" in name):
+                    pos = 0
+                elif "write rate" in name or ("write" in name and "rate" in name):
+                    pos = 1
+                else:
+                    continue
+                v = self._sensor_value(s, ident)
+                if v is not None:
+                    slot[pos] += v
+            for r_local, w_local in per_hw.values():
                 if r_local > 0 or w_local > 0:
                     has_any = True
                     r_bytes += r_local
@@ -555,27 +876,45 @@ class LibreHMReader:
             return None, None
         return int(r_bytes * 8.0), int(w_bytes * 8.0)
 
+    _NO_SUPERIO_WARNING = (
+        "未检测到 SuperIO 节点。可能原因：未以管理员权限运行、LHM 内核驱动未加载、或 DLL 版本与 GUI 不一致。"
+        " 建议：以管理员权限运行 Python；确保 LibreHardwareMonitorLib.dll 与 GUI 报告版本一致（如 0.9.4.0）；关闭可能占用 EC/SuperIO 的其他监控软件后重试。"
+    )
+
     def _post_open_diagnose(self) -> None:
+        """
+        启动自检：常规模式仅做轻量 SuperIO 检查；调试模式下才遍历全部传感器输出详细诊断。
+        """
         if not (self.ok and self._comp):
             return
-
-        def walk(hw):
-            yield hw
+        if self.debug:
+            self._deep_diagnose()
+        elif not self._has_superio_fast():
+            logging.warning(self._NO_SUPERIO_WARNING)
+
+    def _has_superio_fast(self) -> bool:
+        # 复用索引构建时记录的硬件节点，仅比较 HardwareType，不枚举传感器、不 Update
+        superio = getattr(self._HardwareType, "SuperIO", None)
+        for node in self._hw_nodes:
             try:
-                for sub in hw.SubHardware:
-                    yield from walk(sub)
+                if superio is not None and node.HardwareType == superio:
+                    return True
+                if "superio" in str(node.HardwareType).lower():
+                    return True
             except Exception:
-                return
+                continue
+        return False
 
+    def _deep_diagnose(self) -> None:
         has_superio = False
         superio_temps: List[Tuple[str, float]] = []
         ec_temps: List[Tuple[str, float]] = []
 
         try:
-            for hw in self._comp.Hardware:
+            for hw in self._top_hw():
                 # 递归更新整棵树
                 self._update_recursive(hw)
-                for node in walk(hw):
+                for node in _walk_hardware(hw):
                     try:
                         hwt = str(node.HardwareType).lower()
                         ident = str(getattr(node, "Identifier", "")).lower()
@@ -598,7 +937,7 @@ class LibreHMReader:
                     try:
                         for s in getattr(node, "Sensors", []):
                             if s.SensorType == self._SensorType.Temperature:
-                                sid = s.Identifier.ToString() if hasattr(s.Identifier, "ToString") else str(s.Identifier)
+                                sid = _sensor_ident(s)
                                 v = float(s.Value) if s.Value is not None else None
                                 if v is None:
                                     continue
@@ -619,10 +958,7 @@ class LibreHMReader:
             return bool(arr) and all(abs(v) < 1e-6 for _, v in arr)
 
         if not has_superio:
-            logging.warning(
-                "未检测到 SuperIO 节点。可能原因：未以管理员权限运行、LHM 内核驱动未加载、或 DLL 版本与 GUI 不一致。"
-                " 建议：以管理员权限运行 Python；确保 LibreHardwareMonitorLib.dll 与 GUI 报告版本一致（如 0.9.4.0）；关闭可能占用 EC/SuperIO 的其他监控软件后重试。"
-            )
+            logging.warning(self._NO_SUPERIO_WARNING)
         elif all_zero(superio_temps):
             logging.warning(
                 "检测到 SuperIO，但温度值均为 0。可能是底层访问受限或冲突。"
@@ -647,22 +983,26 @@ class SensorSelector:
         self.config_path = config_path
         self.sel_temp: Optional[Dict] = None
         self.sel_fan: Optional[Dict] = None
+        # 索引之外（如首次 Update 后才出现）的传感器，首次遍历命中后缓存：Identifier -> (hw, sensor)
+        self._lhm_sensor_cache: Dict[str, Tuple] = {}
+        # 配置文件缓存：mtime 未变时不重复读取/解析
+        self._cfg_mtime: Optional[float] = None
+        self._cfg_cache: Optional[Dict] = None
+        # ensure_selection 后绑定的读取函数（热路径直接调用，不再逐次判断来源类型）
+        self._read_temp_fn = _read_none
+        self._read_fan_fn = _read_none
+        # 候选列表缓存：key -> (单调时钟时间戳, 列表)
+        self._cands_cache: Dict[str, Tuple[float, List]] = {}
 
     def _iter_lhm_sensors_recursive(self):
         if not (self.lhm and self.lhm.ok and self.lhm._comp):
             return
-        def walk(hw):
-            yield hw
-            try:
-                for sub in hw.SubHardware:
-                    yield from walk(sub)
-            except Exception:
-                return
         try:
-            for hw in self.lhm._comp.Hardware:
-                for node in walk(hw):
+            for hw in self.lhm._top_hw():
+                for node in _walk_hardware(hw):
                     try:
-                        self.lhm._update_recursive(node)
+                        # _walk_hardware 已展开子硬件，这里只刷新当前节点
+                        self.lhm._ensure_updated(node)
                         for s in node.Sensors:
                             yield node, s
                     except Exception:
@@ -670,30 +1010,67 @@ class SensorSelector:
         except Exception:
             return
 
-    def list_temp_candidates(self) -> List[Dict]:
-        cands: List[Dict] = []
-        # LHM 温度（递归所有子硬件）
+    _CANDS_TTL = 30.0  # 候选列表缓存有效期（秒）
+
+    def refresh(self) -> None:
+        """
+        丢弃缓存的候选列表，下次列举时重新遍历 LHM/WMI。
+        """
+        self._cands_cache.clear()
+
+    def _cached_cands(self, key: str, build) -> List:
+        now = time.monotonic()
+        hit = self._cands_cache.get(key)
+        if hit is not None and now - hit[0] < self._CANDS_TTL:
+            return list(hit[1])
+        cands = build()
+        self._cands_cache[key] = (now, cands)
+        return list(cands)
+
+    def _walk_lhm_candidates(self) -> List[Tuple[str, Dict]]:
+        # 温度与风扇共用一次 LHM 遍历：[("temp"|"fan", 候选), ...]
+        out: List[Tuple[str, Dict]] = []
+        if not (self.lhm and self.lhm.ok and self.lhm._comp):
+            return out
+        ST = self.lhm._SensorType
         try:
             for hw, s in self._iter_lhm_sensors_recursive() or []:
                 try:
-                    if s.SensorType == self.lhm._SensorType.Temperature:  # type: ignore
-                        ident = s.Identifier.ToString() if hasattr(s.Identifier, "ToString") else str(s.Identifier)
-                        name = f"LHM | {hw.HardwareType} | {(hw.Name or '')} | {(s.Name or '')}"
+                    st = s.SensorType
+                    if st == ST.Temperature:
+                        kind = "temp"
+                    elif st == ST.Fan:
+                        kind = "fan"
+                    else:
+                        continue
+                    ident = _sensor_ident(s)
+                    name = f"LHM | {hw.HardwareType} | {(hw.Name or '')} | {(s.Name or '')}"
+                    val = None
+                    try:
+                        if s.Value is not None:
+                            val = float(s.Value)
+                    except Exception:
                         val = None
-                        try:
-                            if s.Value is not None:
-                                val = float(s.Value)
-                        except Exception:
-                            val = None
-                        cands.append({"type": "LHM", "id": ident, "name": name, "value": val})
+                    out.append((kind, {"type": "LHM", "id": ident, "name": name, "_name_l": name.lower(), "value": val}))
                 except Exception:
                     continue
         except Exception:
             pass
+        return out
+
+    def list_temp_candidates(self) -> List[Dict]:
+        return self._cached_cands("temps", self._build_temp_candidates)
+
+    def list_fan_candidates(self) -> List[Dict]:
+        return self._cached_cands("fans", self._build_fan_candidates)
+
+    def _build_temp_candidates(self) -> List[Dict]:
+        # LHM 温度（递归所有子硬件）
+        cands: List[Dict] = [c for kind, c in self._cached_cands("lhm", self._walk_lhm_candidates) if kind == "temp"]
         # WMI 温度（ACPI ThermalZone）
-        if wmi_module is not None and platform.system().lower() == "windows":
+        if get_wmi_module() is not None:
             try:
-                c = wmi_module.WMI(namespace="root\\wmi")
+                c = get_wmi_connection("root\\wmi")
                 items = c.MSAcpi_ThermalZoneTemperature()
                 for i, it in enumerate(items):
                     t = getattr(it, "CurrentTemperature", None)
@@ -706,35 +1083,18 @@ class SensorSelector:
                     except Exception:
                         pass
                     name = f"WMI | ACPI ThermalZone | idx={i} | {getattr(it,'InstanceName', '')}"
-                    cands.append({"type": "WMI_ACPI", "id": f"WMI:ACPI:{i}", "name": name, "value": val})
+                    cands.append({"type": "WMI_ACPI", "id": f"WMI:ACPI:{i}", "name": name, "_name_l": name.lower(), "value": val, "path": _wmi_rel_path(it)})
             except Exception:
                 pass
         return cands
 
-    def list_fan_candidates(self) -> List[Dict]:
-        cands: List[Dict] = []
+    def _build_fan_candidates(self) -> List[Dict]:
         # LHM 风扇（递归所有子硬件）
-        try:
-            for hw, s in self._iter_lhm_sensors_recursive() or []:
-                try:
-                    if s.SensorType == self.lhm._SensorType.Fan:  # type: ignore
-                        ident = s.Identifier.ToString() if hasattr(s.Identifier, "ToString") else str(s.Identifier)
-                        name = f"LHM | {hw.HardwareType} | {(hw.Name or '')} | {(s.Name or '')}"
-                        val = None
-                        try:
-                            if s.Value is not None:
-                                val = float(s.Value)
-                        except Exception:
-                            val = None
-                        cands.append({"type": "LHM", "id": ident, "name": name, "value": val})
-                except Exception:
-                    continue
-        except Exception:
-            pass
+        cands: List[Dict] = [c for kind, c in self._cached_cands("lhm", self._walk_lhm_candidates) if kind == "fan"]
         # WMI 风扇
-        if wmi_module is not None and platform.system().lower() == "windows":
+        if get_wmi_module() is not None:
             try:
-                c = wmi_module.WMI()
+                c = get_wmi_connection()
                 items = c.Win32_Fan()
                 for i, it in enumerate(items):
                     sp = getattr(it, "Speed", None)
@@ -747,61 +1107,109 @@ class SensorSelector:
                     except Exception:
                         pass
                     name = f"WMI | Win32_Fan | idx={i} | {getattr(it,'Name','')} {getattr(it,'DeviceID','')}"
-                    cands.append({"type": "WMI_FAN", "id": f"WMI:FAN:{i}", "name": name, "value": val})
+                    cands.append({"type": "WMI_FAN", "id": f"WMI:FAN:{i}", "name": name, "_name_l": name.lower(), "value": val, "path": _wmi_rel_path(it)})
             except Exception:
                 pass
         return cands
 
+    # 自动选择的名称关键字（优先级最高的一档）
+    _AUTO_TEMP_KEYWORDS = re.compile(r"package|tctl|tdie|cpu")
+    _AUTO_FAN_KEYWORDS = re.compile(r"cpu|aio|pump")
+
+    @staticmethod
+    def _pick_max(cands: List[Dict], tier_of, lo: float, hi: float, lo_inclusive: bool) -> Optional[Dict]:
+        # 单次遍历：每个候选只解析一次数值，按档位记录最大值；返回最高非空档位的最大项（并列时取先出现者）
+        best: Dict[int, Tuple[float, Dict]] = {}
+        for c in cands:
+            v = c.get("value")
+            # 数值类型直接比较，仅字符串才尝试解析，避免异常控制流（NaN 不满足下方区间判断）
+            if isinstance(v, (int, float)):
+                vv = float(v)
+            elif isinstance(v, str):
+                try:
+                    vv = float(v)
+                except ValueError:
+                    continue
+            else:
+                continue
+            if not ((lo <= vv if lo_inclusive else lo < vv) and vv < hi):
+                continue
+            tier = tier_of(c)
+            if tier is None:
+                continue
+            cur = best.get(tier)
+            if cur is None or vv > cur[0]:
+                best[tier] = (vv, c)
+        return best[min(best)][1] if best else None
+
     def _auto_pick_temp(self, temps: List[Dict]) -> Optional[Dict]:
         # 启发式：优先名称含 package/tctl/tdie/cpu 的 LHM 候选，且数值在(0.5,120)；其次 WMI ACPI
-        def okv(v): 
-            try:
-                vv = float(v)
-                return 0.5 < vv < 120.0
-            except Exception:
-                return False
-        cpu_keywords = ("package", "tctl", "tdie", "cpu")
-        cpu_like = [t for t in temps if t["type"] == "LHM" and any(k in (t["name"] or "").lower() for k in cpu_keywords) and okv(t.get("value"))]
-        if cpu_like:
-            return max(cpu_like, key=lambda x: float(x["value"]))
-        acpi = [t for t in temps if t["type"] == "WMI_ACPI" and okv(t.get("value"))]
-        if acpi:
-            return max(acpi, key=lambda x: float(x["value"]))
-        return None
+        kw = self._AUTO_TEMP_KEYWORDS
+        def tier_of(t: Dict) -> Optional[int]:
+            typ = t["type"]
+            if typ == "LHM":
+                return 0 if kw.search(t.get("_name_l") or (t["name"] or "").lower()) else None
+            return 1 if typ == "WMI_ACPI" else None
+        return self._pick_max(temps, tier_of, 0.5, 120.0, lo_inclusive=False)
 
     def _auto_pick_fan(self, fans: List[Dict]) -> Optional[Dict]:
-        def okv(v): 
-            try:
-                vv=float(v); 
-                return 1.0 <= vv < 20000.0
-            except Exception: 
-                return False
-        pri = [f for f in fans if f["type"] == "LHM" and any(k in (f["name"] or "").lower() for k in ("cpu","aio","pump")) and okv(f.get("value"))]
-        if pri:
-            return max(pri, key=lambda x: float(x["value"]))
-        lhm_any = [f for f in fans if f["type"] == "LHM" and okv(f.get("value"))]
-        if lhm_any:
-            return max(lhm_any, key=lambda x: float(x["value"]))
-        wmi_fans = [f for f in fans if f["type"] == "WMI_FAN" and okv(f.get("value"))]
-        if wmi_fans:
-            return max(wmi_fans, key=lambda x: float(x["value"]))
-        return None
+        # 启发式：名称含 cpu/aio/pump 的 LHM 风扇 > 任意 LHM 风扇 > WMI 风扇，数值在[1,20000)
+        kw = self._AUTO_FAN_KEYWORDS
+        def tier_of(f: Dict) -> Optional[int]:
+            typ = f["type"]
+            if typ == "LHM":
+                return 0 if kw.search(f.get("_name_l") or (f["name"] or "").lower()) else 1
+            return 2 if typ == "WMI_FAN" else None
+        return self._pick_max(fans, tier_of, 1.0, 20000.0, lo_inclusive=True)
 
     def _save_config(self):
-        cfg = {"temp_source": self.sel_temp, "fan_source": self.sel_fan, "created_at": time.strftime("%Y-%m-%d %H:%M:%S")}
+        # 序列化结果与现有文件逐字节一致时不重写（created_at 沿用原文件中的首次写入时间）
+        try:
+            old = self._read_config_file()
+        except Exception:
+            old = None  # 原文件损坏时直接覆盖
+        if not isinstance(old, dict):
+            old = None  # 合法 JSON 但不是对象（如 []）时同样视为无效配置
+        created_at = (old or {}).get("created_at") or time.strftime("%Y-%m-%d %H:%M:%S")
+        cfg = {"temp_source": _persistable(self.sel_temp), "fan_source": _persistable(self.sel_fan), "created_at": created_at}
+        payload = json.dumps(cfg, ensure_ascii=False, indent=2).encode("utf-8")
+        try:
+            with open(self.config_path, "rb") as f:
+                if f.read() == payload:
+                    return
+        except OSError:
+            pass
+        tmp_path = self.config_path + ".tmp"
         try:
-            with open(self.config_path, "w", encoding="utf-8") as f:
-                json.dump(cfg, f, ensure_ascii=False, indent=2)
+            # 先写临时文件再原子替换，避免外部进程读到写了一半的 JSON
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, self.config_path)
+            self._cfg_cache = cfg
+            self._cfg_mtime = os.stat(self.config_path).st_mtime
             logging.info(f"传感器来源配置已写入: {self.config_path}")
         except Exception as e:
             logging.warning(f"写入 {self.config_path} 失败: {e}")
 
+    def _read_config_file(self) -> Optional[Dict]:
+        # 读取并缓存配置；mtime 未变时直接复用。文件不存在返回 None，解析失败抛出
+        try:
+            mtime = os.stat(self.config_path).st_mtime
+        except OSError:
+            return None
+        if self._cfg_cache is not None and mtime == self._cfg_mtime:
+            return self._cfg_cache
+        with open(self.config_path, "r", encoding="utf-8") as f:
+            cfg = json.load(f)
+        self._cfg_cache = cfg
+        self._cfg_mtime = mtime
+        return cfg
+
     def _load_config(self) -> bool:
-        if not os.path.exists(self.config_path):
-            return False
         try:
-            with open(self.config_path, "r", encoding="utf-8") as f:
-                cfg = json.load(f)
+            cfg = self._read_config_file()
+            if cfg is None:
+                return False
             self.sel_temp = cfg.get("temp_source") or None
             self.sel_fan = cfg.get("fan_source") or None
             return True
@@ -822,6 +1230,7 @@ class SensorSelector:
     def ensure_selection(self):
         # 已有配置直接返回（不等待）
         if self._load_config():
+            self._bind_readers()
             return
 
         is_tty = bool(sys.stdin and sys.stdin.isatty())
@@ -867,14 +1276,82 @@ class SensorSelector:
                 logging.info(f"自动选择风扇源: {self.sel_fan['name'] if self.sel_fan else '无'}")
 
         self._save_config()
+        self._bind_readers()
+
+    def _bind_readers(self) -> None:
+        """
+        按已选来源预先绑定温度/风扇读取函数；来源不可用时绑定为恒返回 None。
+        """
+        wmi_ok = get_wmi_module() is not None
+        lhm_ok = bool(self.lhm and self.lhm.ok and self.lhm._comp)
+
+        def bind(sel: Optional[Dict], wmi_type: str, wmi_reader):
+            if not sel:
+                return _read_none
+            if sel.get("type") == "LHM":
+                return functools.partial(self._read_lhm_by_id, sel["id"]) if lhm_ok else _read_none
+            if sel.get("type") == wmi_type and wmi_ok:
+                if not sel.get("path"):
+                    # sel 可能与 30 秒候选缓存共享同一对象：复制后再写入解析出的路径，只随读取函数绑定
+                    sel = dict(sel)
+                    if not self._resolve_wmi_path(sel):
+                        return _read_none
+                return functools.partial(wmi_reader, sel)
+            return _read_none
+
+        self._read_temp_fn = bind(self.sel_temp, "WMI_ACPI", self._read_wmi_temp)
+        self._read_fan_fn = bind(self.sel_fan, "WMI_FAN", self._read_wmi_fan)
+
+    # WMI 候选类型 -> (命名空间, 枚举语句)
+    _WMI_SOURCES = {
+        "WMI_ACPI": ("root\\wmi", "SELECT * FROM MSAcpi_ThermalZoneTemperature"),
+        "WMI_FAN": ("root\\cimv2", _WQL_FAN),
+    }
+
+    def _resolve_wmi_path(self, sel: Dict) -> bool:
+        """
+        旧配置只记录了序号（WMI:ACPI:<idx>）：绑定时枚举一次，将序号换算为实例路径写入 sel["path"]（调用方传入副本），
+        之后按路径直接读取。序号越界返回 False；WMI 暂不可用时保留序号回退并返回 True。
+        """
+        try:
+            namespace, wql = self._WMI_SOURCES[sel["type"]]
+            idx = int(sel["id"].split(":")[-1])
+            rows = wmi_query_rows(namespace, wql, ("Path_",))
+        except Exception:
+            return True
+        if not (0 <= idx < len(rows)):
+            return False
+        path = _wmi_rel_path_of(rows[idx][0])
+        if path:
+            sel["path"] = path
+        return True
 
     def _read_lhm_by_id(self, ident: str) -> Optional[float]:
         if not (self.lhm and self.lhm.ok and self.lhm._comp):
             return None
+        # 优先使用 LHM 索引（Identifier 已在构建时缓存），只刷新该传感器所属节点
+        hit = self.lhm.sensor_by_ident(ident)
+        if hit is not None:
+            hw, s = hit
+            self.lhm._ensure_updated(hw)
+            try:
+                return self.lhm._sensor_value(s, ident)
+            except Exception:
+                return None
+        # 索引未收录：先查本地缓存，读取失败（传感器已移除）则作废后重新遍历
+        cached = self._lhm_sensor_cache.get(ident)
+        if cached is not None:
+            hw, s = cached
+            try:
+                self.lhm._ensure_updated(hw)
+                return self.lhm._sensor_value(s, ident)
+            except Exception:
+                self._lhm_sensor_cache.pop(ident, None)
         try:
             for hw, s in self._iter_lhm_sensors_recursive() or []:
-                sid = s.Identifier.ToString() if hasattr(s.Identifier, "ToString") else str(s.Identifier)
+                sid = _sensor_ident(s)
                 if sid == ident:
+                    self._lhm_sensor_cache[ident] = (hw, s)
                     try:
                         return float(s.Value) if s.Value is not None else None
                     except Exception:
@@ -885,72 +1362,46 @@ class SensorSelector:
 
     def read_temp_c(self) -> Optional[float]:
         # 按用户选择的来源读取值（不强制过滤 0 值）
-        if self.sel_temp is None:
-            return None
-        try:
-            if self.sel_temp["type"] == "LHM":
-                return self._read_lhm_by_id(self.sel_temp["id"])
-            if self.sel_temp["type"] == "WMI_ACPI" and wmi_module is not None and platform.system().lower() == "windows":
-                idx = int(self.sel_temp["id"].split(":")[-1])
-                c = wmi_module.WMI(namespace="root\\wmi")
-                items = c.MSAcpi_ThermalZoneTemperature()
-                if 0 <= idx < len(items):
-                    t = getattr(items[idx], "CurrentTemperature", None)
-                    if t is None:
-                        t = getattr(items[idx], "Temperature", None)
-                    if t is not None:
-                        return float(t) / 10.0 - 273.15
-        except Exception:
-            return None
-        return None
+        return self._read_temp_fn()
 
     def read_fan_rpm(self) -> Optional[float]:
         # 按用户选择的来源读取值（不强制过滤 0 值）
-        if self.sel_fan is None:
-            return None
+        return self._read_fan_fn()
+
+    @staticmethod
+    def _read_wmi_temp(sel: Dict) -> Optional[float]:
         try:
-            if self.sel_fan["type"] == "LHM":
-                return self._read_lhm_by_id(self.sel_fan["id"])
-            if self.sel_fan["type"] == "WMI_FAN" and wmi_module is not None and platform.system().lower() == "windows":
-                idx = int(self.sel_fan["id"].split(":")[-1])
-                c = wmi_module.WMI()
-                items = c.Win32_Fan()
-                if 0 <= idx < len(items):
-                    sp = getattr(items[idx], "Speed", None)
-                    if sp is None:
-                        sp = getattr(items[idx], "DesiredSpeed", None)
-                    if sp is not None:
-                        return float(sp)
+            path = sel.get("path")
+            if path:
+                # 按实例键直接读取（旧配置没有 path，回退按序号枚举）
+                t = _wmi_get_props("root\\wmi", path, ("CurrentTemperature",))[0]
+            else:
+                idx = int(sel["id"].split(":")[-1])
+                rows = wmi_query_rows("root\\wmi", _WQL_THERMAL_ZONE, ("CurrentTemperature",))
+                t = rows[idx][0] if 0 <= idx < len(rows) else None
+            if t is not None:
+                return float(t) / 10.0 - 273.15
         except Exception:
             return None
         return None
 
-    def _prefetch_refresh(self, label: str, tries: int = 5, interval: float = 2.0, tty: bool = False) -> None:
-        """
-        在交互前进行多次刷新，避免一次性读取到 0。
-        - label: "温度"/"风扇" 等提示标签
-        - tries: 刷新次数
-        - interval: 每次刷新间隔秒
-        - tty: 是否有交互终端；有则用 print，无则 logging.info
-        """
-        # 已移除预刷新逻辑
-        return
-
-        if not (self.lhm and self.lhm.ok and self.lhm._comp):
-            return
-        for i in range(tries):
-            msg = f"[{label}] 正在刷新 {i+1}/{tries}（间隔 {interval:.0f}s）..."
-            if tty:
-                print(msg, flush=True)
+    @staticmethod
+    def _read_wmi_fan(sel: Dict) -> Optional[float]:
+        try:
+            path = sel.get("path")
+            if path:
+                # 按 DeviceID 键直接读取（旧配置没有 path，回退按序号枚举）
+                speed, desired = _wmi_get_props("root\\cimv2", path, ("Speed", "DesiredSpeed"))
             else:
-                logging.info(msg)
-            try:
-                # 刷新所有硬件节点（包含子硬件）
-                for hw in self.lhm._comp.Hardware:
-                    self.lhm._update_recursive(hw)
-            except Exception:
-                pass
-            time.sleep(interval)
+                idx = int(sel["id"].split(":")[-1])
+                rows = wmi_query_rows("root\\cimv2", _WQL_FAN, ("Speed", "DesiredSpeed"))
+                speed, desired = rows[idx] if 0 <= idx < len(rows) else (None, None)
+            sp = speed if speed is not None else desired
+            if sp is not None:
+                return float(sp)
+        except Exception:
+            return None
+        return None
 
 class Metrics:
     def __init__(self, process_names: List[str], debug: bool = False) -> None:
@@ -958,15 +1409,36 @@ class Metrics:
         self.prev_net = psutil.net_io_counters()
         self.prev_disks = psutil.disk_io_counters(perdisk=True)
         self.prev_time = time.time()
+        # 计数器快照各自对应的单调时钟时间戳，增量与时间窗口严格对齐
+        self._prev_net_ts = self._prev_disks_ts = time.monotonic()
         self.debug = debug
 
         # 逻辑 CPU 数缓存
         self.ncpu = max(1, int(psutil.cpu_count(logical=True) or os.cpu_count() or 1))
+        self._inv_ncpu = 1.0 / self.ncpu  # 进程 CPU% 归一化到整机 100% 尺度
         if self.debug:
             logging.debug(f"[Metrics] 逻辑 CPU 线程数: {self.ncpu}")
 
         # 解析“显示名=路径子串” -> [(display, pattern_lower)]
-        self.process_queries: List[Tuple[str, str]] = self._build_process_queries(self.process_names)
+        self.process_queries: Tuple[Tuple[str, str], ...] = self._build_process_queries(self.process_names)
+        self._proc_matcher = self._build_process_matcher(self.process_queries)
+        # 进程 CPU%：按 pid 记录上次 (user+system) 累计时间，与上次采样的单调时钟求差
+        self._prev_cpu_times: Dict[int, float] = {}
+        self._prev_cpu_ts: Optional[float] = None
+        # 进程 name/exe 缓存：(pid, create_time) -> (name, exe)，进程生命周期内不变
+        self._proc_ident_cache: Dict[Tuple[int, float], Tuple[Optional[str], Optional[str]]] = {}
+        # system_info 静态部分与磁盘总量缓存（单调时钟时间戳）
+        self._sysinfo_cache: Optional[Dict] = None
+        self._sysinfo_cache_ts = 0.0
+        self._disk_total_cache: Optional[int] = None
+        self._disk_total_ts = 0.0
+        # 本地分区挂载点缓存与并发查询 disk_usage 的线程池（首次使用时创建）
+        self._mounts_cache: Optional[List[str]] = None
+        self._mounts_ts = 0.0
+        self._disk_pool: Optional[ThreadPoolExecutor] = None
+        # 超时的挂载点：仍在执行的查询（不再重复排队）与退避截止时间（单调时钟）
+        self._disk_pending: Dict[str, Future] = {}
+        self._disk_backoff: Dict[str, float] = {}
         if self.debug:
             logging.debug(f"[Metrics] 进程查询项: {self.process_queries}")
 
@@ -986,9 +1458,9 @@ class Metrics:
 
         psutil.cpu_percent(interval=0.1, percpu=True)
 
-    def _build_process_queries(self, items: List[str]) -> List[Tuple[str, str]]:
+    def _build_process_queries(self, items: List[str]) -> Tuple[Tuple[str, str], ...]:
         """
-        将 ['显示名=路径子串', 'X', ...] 解析为 [(显示名, 路径子串lower)]。
+        将 ['显示名=路径子串', 'X', ...] 解析为 ((显示名, 路径子串lower), ...)，字符串经 intern 驻留。
         若没有 '='，则显示名与路径子串相同。
         """
         queries: List[Tuple[str, str]] = []
@@ -1004,8 +1476,19 @@ class Metrics:
             pat = (pat or "").strip().lower()
             if not disp or not pat:
                 continue
-            queries.append((disp, pat))
-        return queries
+            queries.append((sys.intern(disp), sys.intern(pat)))
+        return tuple(queries)
+
+    @staticmethod
+    def _build_process_matcher(queries: Tuple[Tuple[str, str], ...]) -> Optional["re.Pattern"]:
+        """
+        将全部路径子串编译为单个交替正则，用作预过滤：未命中任何子串的进程只需扫描一次路径。
+        命中后仍按查询项顺序确定归属（正则只能给出最左命中位置，不等价于“首个查询项”）。
+        """
+        pats = sorted({pat for _, pat in queries if pat}, key=len, reverse=True)
+        if not pats:
+            return None
+        return re.compile("|".join(map(re.escape, pats)))
 
     def collect_cpu(self) -> Tuple[float, List[float]]:
         total = psutil.cpu_percent(interval=None)
@@ -1013,53 +1496,35 @@ class Metrics:
         return float(total), [float(x) for x in per_core]
 
     def _cpu_fan_rpm_wmi(self) -> Optional[float]:
-        if wmi_module is None or platform.system().lower() != "windows":
+        if get_wmi_module() is None:  # 非 Windows 时同样为 None
             return None
         try:
-            c = wmi_module.WMI()
-            fans = c.Win32_Fan()  # 可能无数据
-            vals: List[float] = []
-            for f in fans:
-                sp = getattr(f, "Speed", None)
+            rows = wmi_query_rows("root\\cimv2", _WQL_FAN, ("Speed", "DesiredSpeed"))  # 可能无数据
+            # 累加求均值，不构造中间列表；异常只在整体层面捕获
+            total = 0.0
+            count = 0
+            for speed, desired in rows:
+                sp = speed if speed is not None else desired
                 if sp is None:
-                    sp = getattr(f, "DesiredSpeed", None)
-                if sp is not None:
-                    try:
-                        rpm = float(sp)
-                        if 1.0 <= rpm < 20000.0:
-                            vals.append(rpm)
-                    except Exception:
-                        pass
-            if vals:
-                return sum(vals) / len(vals)
+                    continue
+                rpm = float(sp)
+                if 1.0 <= rpm < 20000.0:
+                    total += rpm
+                    count += 1
+            if count:
+                return total / count
         except Exception:
             pass
         return None
 
     def _cpu_package_temp_wmi(self) -> Optional[float]:
         # 使用 ACPI ThermalZone（单位 1/10 K），并取最大值作为近似 CPU 区域温度
-        if wmi_module is None or platform.system().lower() != "windows":
+        if get_wmi_module() is None:  # 非 Windows 时同样为 None
             return None
         try:
-            c = wmi_module.WMI(namespace="root\\wmi")
-            try:
-                items = c.MSAcpi_ThermalZoneTemperature()
-            except Exception:
-                items = []
-            vals: List[float] = []
-            for it in items:
-                t = getattr(it, "CurrentTemperature", None)
-                if t is None:
-                    t = getattr(it, "Temperature", None)
-                if t is not None:
-                    try:
-                        celsius = float(t) / 10.0 - 273.15
-                        if -20.0 < celsius < 120.0 and celsius > 0.5:
-                            vals.append(celsius)
-                    except Exception:
-                        pass
-            if vals:
-                return max(vals)
+            rows = wmi_query_rows("root\\wmi", _WQL_THERMAL_ZONE, ("CurrentTemperature",))
+            celsius = (float(t) / 10.0 - 273.15 for (t,) in rows if t is not None)
+            return max((c for c in celsius if 0.5 < c < 120.0), default=None)
         except Exception:
             pass
         return None
@@ -1106,39 +1571,52 @@ class Metrics:
 
         return {"freq_mhz": freq_mhz, "fan_rpm": fan_rpm, "package_temp_c": package_temp_c}
     
-    def net_io_rates(self) -> Dict[str, int]:
-        try:
-            if self.lhm and self.lhm.ok:
-                up_bps, down_bps = self.lhm.nic_up_down_bps()
-                if up_bps is not None and down_bps is not None:
-                    if self.debug:
-                        logging.debug(f"net(LHM) up={up_bps}bps down={down_bps}bps")
-                    return {"up_bps": int(up_bps), "down_bps": int(down_bps)}
-        except Exception:
-            pass
-        now = time.time()
-        delta = max(0.001, now - self.prev_time)
+    def lhm_io_bps(self) -> Tuple[Tuple[Optional[float], Optional[float]], Tuple[Optional[float], Optional[float]]]:
+        """
+        读取 LHM 网卡 (上行, 下行) 与存储 (读, 写) 速率（bit/s）；须与 begin_tick 在同一线程调用。
+        结果交给 net_io_rates / disk_io_rates，这两者本身不再访问 LHM。
+        """
+        nic: Tuple[Optional[float], Optional[float]] = (None, None)
+        storage: Tuple[Optional[float], Optional[float]] = (None, None)
+        if self.lhm and self.lhm.ok:
+            try:
+                nic = self.lhm.nic_up_down_bps()
+            except Exception:
+                pass
+            try:
+                storage = self.lhm.storage_read_write_bps()
+            except Exception:
+                pass
+        return nic, storage
+
+    def net_io_rates(self, lhm_bps: Tuple[Optional[float], Optional[float]] = (None, None)) -> Dict[str, int]:
+        # 优先 LHM 读数（由 lhm_io_bps 预先读取），缺失时回退 psutil 增量法
+        up_bps, down_bps = lhm_bps
+        if up_bps is not None and down_bps is not None:
+            if self.debug:
+                logging.debug(f"net(LHM) up={up_bps}bps down={down_bps}bps")
+            return {"up_bps": int(up_bps), "down_bps": int(down_bps)}
         current = psutil.net_io_counters()
+        now = time.monotonic()
+        delta = max(0.001, now - self._prev_net_ts)
         up_bps = int((current.bytes_sent - self.prev_net.bytes_sent) * 8 / delta)
         down_bps = int((current.bytes_recv - self.prev_net.bytes_recv) * 8 / delta)
         self.prev_net = current
+        self._prev_net_ts = now
         if self.debug:
             logging.debug(f"net(psutil) delta={delta:.3f}s up={up_bps}bps down={down_bps}bps")
         return {"up_bps": up_bps, "down_bps": down_bps}
 
-    def disk_io_rates(self) -> Dict[str, int]:
-        # 优先 LHM（聚合所有磁盘 Read/Write Rate -> bit/s）
-        try:
-            if self.lhm and self.lhm.ok:
-                r_bps, w_bps = self.lhm.storage_read_write_bps()
-                if r_bps is not None and w_bps is not None:
-                    if self.debug:
-                        logging.info(f"disk(LHM) read={r_bps}bps write={w_bps}bps")
-                    return {"read_bps": int(r_bps), "write_bps": int(w_bps)}
-        except Exception:
-            pass
+    def disk_io_rates(self, lhm_bps: Tuple[Optional[float], Optional[float]] = (None, None)) -> Dict[str, int]:
+        # 优先 LHM（聚合所有磁盘 Read/Write Rate -> bit/s，由 lhm_io_bps 预先读取）
+        r_bps, w_bps = lhm_bps
+        if r_bps is not None and w_bps is not None:
+            if self.debug:
+                logging.info(f"disk(LHM) read={r_bps}bps write={w_bps}bps")
+            return {"read_bps": int(r_bps), "write_bps": int(w_bps)}
         # 回退 psutil 增量法
         now_disks = psutil.disk_io_counters(perdisk=True)
+        now = time.monotonic()
         read_bytes = 0
         write_bytes = 0
         for name, stats in now_disks.items():
@@ -1147,20 +1625,113 @@ class Metrics:
                 read_bytes += max(0, stats.read_bytes - prev.read_bytes)
                 write_bytes += max(0, stats.write_bytes - prev.write_bytes)
         self.prev_disks = now_disks
-        delta = max(0.001, time.time() - self.prev_time)
+        delta = max(0.001, now - self._prev_disks_ts)
+        self._prev_disks_ts = now
         read_bps = int(read_bytes * 8 / delta)
         write_bps = int(write_bytes * 8 / delta)
         if self.debug:
             logging.debug(f"disk(psutil) delta={delta:.3f}s read={read_bps}bps write={write_bps}bps")
         return {"read_bps": read_bps, "write_bps": write_bps}
 
+    _SYSINFO_TTL = 3600.0   # OS/CPU/内存/显存几乎不变
+    _DISK_TOTAL_TTL = 60.0  # 允许感知分区增减
+
     def system_info(self) -> Dict[str, Optional[int]]:
+        now = time.monotonic()
+        if self._sysinfo_cache is None or now - self._sysinfo_cache_ts >= self._SYSINFO_TTL:
+            self._sysinfo_cache = self._read_static_system_info()
+            self._sysinfo_cache_ts = now
+        info = dict(self._sysinfo_cache)
+        info["disk_total"] = self._disk_total()
+        return info
+
+    def _disk_total(self) -> int:
+        now = time.monotonic()
+        if self._disk_total_cache is not None and now - self._disk_total_ts < self._DISK_TOTAL_TTL:
+            return self._disk_total_cache
+        disk_total, _ = self.disk_usage_totals()
+        self._disk_total_cache = disk_total
+        self._disk_total_ts = now
+        return disk_total
+
+    _PARTITIONS_TTL = 60.0      # 分区列表很少变化
+    _DISK_USAGE_TIMEOUT = 2.0   # 单次汇总等待上限，超时的慢盘/掉线盘本次跳过
+    _DISK_USAGE_BACKOFF = 60.0  # 超时的挂载点在此时间内不再查询
+    _NETWORK_FSTYPES = frozenset(("nfs", "nfs4", "cifs", "smbfs"))
+
+    def _local_mountpoints(self) -> List[str]:
+        now = time.monotonic()
+        if self._mounts_cache is None or now - self._mounts_ts >= self._PARTITIONS_TTL:
+            mounts: List[str] = []
+            for p in psutil.disk_partitions(all=False):
+                if not p.fstype or not p.mountpoint:
+                    continue
+                # 网络盘（Windows 映射盘 opts 含 remote）不计入本机存储
+                if p.fstype.lower() in self._NETWORK_FSTYPES or "remote" in (p.opts or "").split(","):
+                    continue
+                mounts.append(p.mountpoint)
+            self._mounts_cache = mounts
+            self._mounts_ts = now
+        return self._mounts_cache
+
+    def disk_usage_totals(self) -> Tuple[int, int]:
+        """
+        返回本地分区 (总量, 已用) 字节数。
+        各分区的 disk_usage 并发查询，某个盘响应过慢时本次不计入，避免拖住采样周期。
+        超时的挂载点进入退避期；其上一次查询仍未返回时不再提交新的查询，避免在卡住的线程后面持续排队。
+        """
+        mounts = self._local_mountpoints()
+        if not mounts:
+            return 0, 0
+        if self._disk_pool is None:
+            self._disk_pool = ThreadPoolExecutor(max_workers=min(8, len(mounts)), thread_name_prefix="disk-usage")
+        now = time.monotonic()
+        futures: Dict[Future, str] = {}
+        for m in mounts:
+            pending = self._disk_pending.get(m)
+            if pending is not None:
+                if not pending.done():
+                    continue
+                del self._disk_pending[m]
+            if self._disk_backoff.get(m, 0.0) > now:
+                continue
+            futures[self._disk_pool.submit(psutil.disk_usage, m)] = m
+        if not futures:
+            return 0, 0
+        done, not_done = wait(futures, timeout=self._DISK_USAGE_TIMEOUT)
+        for fut in not_done:
+            m = futures[fut]
+            self._disk_pending[m] = fut
+            self._disk_backoff[m] = now + self._DISK_USAGE_BACKOFF
+            logging.warning(f"查询分区容量超时（{self._DISK_USAGE_TIMEOUT:.0f}s），{self._DISK_USAGE_BACKOFF:.0f}s 内跳过: {m}")
+        total = used = 0
+        for fut in done:
+            try:
+                u = fut.result()
+            except Exception:
+                continue
+            total += int(u.total)
+            used += int(u.used)
+        return total, used
+
+    def close(self) -> None:
+        """
+        退出清理：关闭 disk_usage 线程池（取消排队中的查询，不等待卡住的线程），并关闭 NVML。
+        """
+        pool, self._disk_pool = self._disk_pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        self._disk_pending.clear()
+        try:
+            self.nvml.shutdown()
+        except Exception:
+            pass
+
+    def _read_static_system_info(self) -> Dict[str, Optional[int]]:
         os_ver = f"{platform.system()} {platform.release()} ({platform.version()})"
         cpu_model = None
         try:
-            import wmi as wmi2  # type: ignore
-            c = wmi2.WMI()
-            cpus = c.Win32_Processor()
+            cpus = get_wmi_connection().Win32_Processor()
             if cpus:
                 cpu_model = cpus[0].Name
         except Exception:
@@ -1187,10 +1758,8 @@ class Metrics:
 
         if vram_total is None:
             try:
-                import wmi as wmi3  # type: ignore
-                c = wmi3.WMI()
                 total = 0
-                for vc in c.Win32_VideoController():
+                for vc in get_wmi_connection().Win32_VideoController():
                     try:
                         if vc.AdapterRAM:
                             total += int(vc.AdapterRAM)
@@ -1200,20 +1769,11 @@ class Metrics:
             except Exception:
                 vram_total = None
 
-        disk_total = 0
-        for p in psutil.disk_partitions(all=False):
-            if p.fstype and p.mountpoint:
-                try:
-                    usage = psutil.disk_usage(p.mountpoint)
-                    disk_total += int(usage.total)
-                except Exception:
-                    continue
         return {
             "os_version": os_ver,
             "cpu_model": cpu_model,
             "ram_total": ram_total,
             "vram_total": vram_total,
-            "disk_total": disk_total,
         }
 
     def sw_versions(self, db: Optional["MariaDB"] = None, web_server_path: Optional[str] = None) -> Dict[str, Optional[str]]:
@@ -1251,12 +1811,12 @@ class Metrics:
         db_version: Optional[str] = None
         if db is not None:
             try:
-                rows = db.query("SELECT VERSION() AS ver")
-                ver = (rows[0].get("ver") if rows else None) or None
+                rows = db.query_named("SELECT VERSION() AS ver")
+                ver = (rows[0].ver if rows else None) or None
                 comment = None
                 try:
-                    rows2 = db.query("SELECT @@version_comment AS vc")
-                    comment = (rows2[0].get("vc") if rows2 else None) or None
+                    rows2 = db.query_named("SELECT @@version_comment AS vc")
+                    comment = (rows2[0].vc if rows2 else None) or None
                 except Exception:
                     comment = None
                 db_type, db_version = _classify_mysql_family(ver, comment)
@@ -1286,18 +1846,50 @@ class Metrics:
             "openssh": openssh or "N/A",
         }
 
-    def process_status(self) -> List[Dict]:
+    def process_snapshot(self) -> List[psutil.Process]:
+        """
+        枚举一次进程，并在 p.info 中补全 name/exe。
+        二者在进程生命周期内不变，按 (pid, create_time) 缓存，只对新出现的进程查询一次；
+        已退出的进程随本轮结果自然淘汰。
+        """
+        def _attr(fn):
+            try:
+                return fn()
+            except Exception:
+                return None
+
+        ident_cache = self._proc_ident_cache
+        fresh: Dict[Tuple[int, float], Tuple[Optional[str], Optional[str]]] = {}
+        procs = list(psutil.process_iter(attrs=["pid", "create_time"]))
+        for p in procs:
+            info = p.info
+            ctime = info.get("create_time")
+            key = (info.get("pid"), ctime)
+            ident = ident_cache.get(key) if ctime is not None else None
+            if ident is None:
+                with p.oneshot():
+                    ident = (_attr(p.name), _attr(p.exe))
+            if ctime is not None:
+                fresh[key] = ident
+            info["name"], info["exe"] = ident
+        self._proc_ident_cache = fresh
+        return procs
+
+    def process_status(self, procs: Optional[List] = None) -> List[Dict]:
         """
         进程检测（路径匹配版）：
+        - procs：本周期已枚举的进程快照（见 process_snapshot），为空时自行枚举；
         - 仅使用进程可执行文件完整路径 exe 做大小写不敏感的连续子串匹配；
         - 查询项格式：显示名=路径子串（显示名用于展示/入库，不参与匹配）；
         - 父路径会匹配其下所有进程；
         - 防爆阈值：每项匹配数>64 记录警告；>128 立即终止并仅返回该项的告警结果。
         CPU%：聚合后按逻辑 CPU 数归一化为“整机 100% 尺度”
         """
-        queries = getattr(self, "process_queries", None) or self._build_process_queries(self.process_names)
+        # 查询项与预过滤正则在 __init__ 中一次性构建
+        queries = self.process_queries
         if not queries:
             return []
+        matcher = self._proc_matcher
 
         grouped: Dict[str, Dict[str, float]] = {}
         match_samples: Dict[str, List[str]] = {}
@@ -1305,9 +1897,17 @@ class Metrics:
         warn_flags: Dict[str, bool] = {}
         hard_abort_item: Optional[Tuple[str, str]] = None  # (display, pattern)
 
-        ncpu = getattr(self, "ncpu", None) or max(1, int(psutil.cpu_count(logical=True) or os.cpu_count() or 1))
+        ncpu = self.ncpu
+        inv_ncpu = self._inv_ncpu
+
+        now_ts = time.monotonic()
+        elapsed = (now_ts - self._prev_cpu_ts) if self._prev_cpu_ts is not None else 0.0
+        prev_cpu_times = self._prev_cpu_times
+        cur_cpu_times: Dict[int, float] = {}
 
-        for proc in psutil.process_iter(attrs=["name", "exe"]):
+        if procs is None:
+            procs = self.process_snapshot()
+        for proc in procs:
             if hard_abort_item:
                 break
             try:
@@ -1316,6 +1916,8 @@ class Metrics:
                 if not pexe:
                     continue
                 pexe_l = pexe.lower()
+                if matcher is not None and matcher.search(pexe_l) is None:
+                    continue
 
                 for disp, pat in queries:
                     if not pat:
@@ -1334,12 +1936,17 @@ class Metrics:
                         if len(match_samples[disp]) < 5:
                             match_samples[disp].append(pexe)
 
+                        # oneshot：CPU 时间与内存信息合并为一次系统查询
                         try:
-                            grouped[disp]["cpu_raw"] += float(proc.cpu_percent(interval=None))
-                        except Exception:
-                            pass
-                        try:
-                            grouped[disp]["mem"] += float(proc.memory_info().rss)
+                            with proc.oneshot():
+                                ct = proc.cpu_times()
+                                rss = proc.memory_info().rss
+                            used = float(ct.user + ct.system)
+                            cur_cpu_times[proc.pid] = used
+                            prev = prev_cpu_times.get(proc.pid)
+                            if prev is not None and elapsed > 0 and used >= prev:
+                                grouped[disp]["cpu_raw"] += (used - prev) / elapsed * 100.0
+                            grouped[disp]["mem"] += float(rss)
                         except Exception:
                             pass
 
@@ -1358,6 +1965,13 @@ class Metrics:
             except Exception:
                 continue
 
+        # 只保留本轮命中的进程，退出的 pid 自然淘汰
+        if hard_abort_item:
+            prev_cpu_times.update(cur_cpu_times)
+        else:
+            self._prev_cpu_times = cur_cpu_times
+        self._prev_cpu_ts = now_ts
+
         result: List[Dict] = []
 
         if hard_abort_item:
@@ -1365,7 +1979,7 @@ class Metrics:
             agg = grouped.get(disp, {"instances": 0, "cpu_raw": 0.0, "mem": 0.0})
             cnt = match_counts.get(disp, 0)
             name_display = f"{disp} [匹配过多({cnt}) 已终止]"
-            cpu_norm = float(agg["cpu_raw"]) / float(ncpu) if ncpu > 0 else 0.0
+            cpu_norm = float(agg["cpu_raw"]) * inv_ncpu
             result.append(
                 {
                     "name": name_display,
@@ -1382,7 +1996,7 @@ class Metrics:
             name_display = disp
             if warn_flags.get(disp, False):
                 name_display = f"{disp} [匹配过多({cnt})]"
-            cpu_norm = float(agg["cpu_raw"]) / float(ncpu) if ncpu > 0 else 0.0
+            cpu_norm = float(agg["cpu_raw"]) * inv_ncpu
             if cnt > 0 and self.debug:
                 logging.debug(
                     f"proc match 显示名='{disp}', pattern='{pat}': instances={int(agg['instances'])}, "
@@ -1398,5 +2012,13 @@ class Metrics:
             )
         return result
 
+    def begin_tick(self) -> None:
+        # 采样周期开始：LHM 统一刷新一次硬件节点，本周期内的各项读取不再重复 Update
+        try:
+            if self.lhm and self.lhm.ok:
+                self.lhm.begin_tick()
+        except Exception:
+            pass
+
     def tick_time(self):
         self.prev_time = time.time()
@@ -1,23 +1,34 @@
 ﻿import argparse
+import atexit
 import ctypes
 import datetime
 import json
 import logging
 import os
-import platform
 import psutil
+import queue
 import signal
 import subprocess
 import sys
+import threading
 import time
 
 from app_config import *
 from collections import deque
-from database import MariaDB
-from LHML import Metrics, wmi_module
+from concurrent.futures import ThreadPoolExecutor
+from heapq import nlargest
+from operator import itemgetter
+from database import MariaDB, decode_pct, encode_int8, encode_pct, encode_uint16
+from LHML import Metrics, get_wmi_module, wmi_query_rows
+from local_store import LocalStore
 from nv_api import NVMLHelper
 from typing import Dict, List, Optional, Tuple
 
+try:
+    import orjson  # type: ignore
+except Exception:
+    orjson = None  # 未安装时回退到标准库 json
+
 def _is_admin() -> bool:
     if os.name != "nt":
         return True
@@ -60,14 +71,12 @@ def dump_psutil_threads_raw(out_path: str = "Psutil.threads.dump.txt") -> Tuple[
                 lines.append(f"  USER='{username}' CREATE_TIME='{ctime_str}' NUM_THREADS={nthreads}")
                 # 线程列表
                 try:
-                    ths = p.threads()  # List[pcputimes(user_time, system_time), id]
+                    ths = p.threads()  # List[pthread(id, user_time, system_time)]
                 except Exception as e_th:
                     lines.append(f"  <threads> AccessDenied/NoSuchProcess: {e_th}")
                     ths = []
-                for t in ths:
-                    # t.id, t.user_time, t.system_time
-                    lines.append(f"  - TID={getattr(t, 'id', 'N/A')} user_time={getattr(t, 'user_time', 'N/A')} system_time={getattr(t, 'system_time', 'N/A')}")
-                    thread_lines += 1
+                lines.extend([f"  - TID={tid} user_time={ut} system_time={st}" for tid, ut, st in ths])
+                thread_lines += len(ths)
                 proc_cnt += 1
             except Exception as e_p:
                 lines.append(f"\nPID=? <process_iter item error>: {e_p}")
@@ -108,19 +117,35 @@ def setup_logger(debug: bool) -> None:
         force=True,  # 强制替换已存在的 handlers，确保生效
     )
 
+# 退出信号（SIGBREAK 为 Windows 控制台关闭事件），模块加载时确定一次
+_EXIT_SIGNALS = tuple(
+    sig for sig in (getattr(signal, "SIGINT", None),
+                    getattr(signal, "SIGTERM", None),
+                    getattr(signal, "SIGBREAK", None))
+    if sig is not None
+)
+
 def install_signal_handlers():
     def _handler(signum, frame):
         logging.info(f"({signum})，正在退出...")
         sys.exit(0)
 
-    for sig in (getattr(signal, "SIGINT", None),
-                getattr(signal, "SIGTERM", None),
-                getattr(signal, "SIGBREAK", None)):  # Windows 控制台关闭事件
-        if sig is not None:
-            try:
-                signal.signal(sig, _handler)
-            except Exception:
-                pass
+    for sig in _EXIT_SIGNALS:
+        try:
+            signal.signal(sig, _handler)
+        except Exception:
+            pass
+
+    # SIGHUP（仅 POSIX）：下一次写入时重新校验/写出静态资源
+    if hasattr(signal, "SIGHUP"):
+        def _reload_assets(signum, frame):
+            global _assets_written
+            logging.info("收到 SIGHUP，将重新写出静态资源")
+            _assets_written = False
+        try:
+            signal.signal(signal.SIGHUP, _reload_assets)
+        except Exception:
+            pass
 
 
 def now_utc() -> datetime.datetime:
@@ -139,16 +164,17 @@ try:
 except Exception:
     clr = None  # 未安装 pythonnet 或 CLR 加载失败时为 None
 
+_HUMAN_SYMBOLS = ("B", "KB", "MB", "GB", "TB")
+
 def bytes2human(n: int) -> str:
-    symbols = ("B", "KB", "MB", "GB", "TB")
-    prefix = {}
-    for i, s in enumerate(symbols):
-        prefix[s] = 1 << (10 * i)
-    for s in reversed(symbols):
-        if n >= prefix[s]:
-            value = float(n) / prefix[s]
-            return f"{value:,.2f} {s}"
-    return f"{n} B"
+    if n < 1:
+        return f"{n} B"
+    # 按二进制位数直接定位单位：每 10 位一级
+    idx = min(len(_HUMAN_SYMBOLS) - 1, (int(n).bit_length() - 1) // 10)
+    return f"{n / (1 << (10 * idx)):,.2f} {_HUMAN_SYMBOLS[idx]}"
+
+# 静态资源是否已写出；运行期模板不变，只在启动或收到 SIGHUP 后重新校验
+_assets_written = False
 
 def ensure_files(
     out_dir: str,
@@ -160,6 +186,7 @@ def ensure_files(
     js_template_path: Optional[str] = None,
     chart_js_path: Optional[str] = None,
 ) -> None:
+    global _assets_written
     os.makedirs(out_dir, exist_ok=True)
     html_path = os.path.join(out_dir, html_name)
     js_path = os.path.join(out_dir, js_name)
@@ -204,6 +231,34 @@ def ensure_files(
         except Exception as e:
             logging.error(f"写入本地 Chart.js 失败: {e}")
 
+    _assets_written = True
+
+def _encode_js_assignment(var_name: str, data: Dict) -> bytes:
+    if orjson is not None:
+        body = orjson.dumps(data)
+    else:
+        body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return f"window.{var_name} = ".encode("ascii") + body + b";"
+
+def _replace_file(path: str, payload: bytes) -> None:
+    # 先写临时文件再原子替换，避免浏览器读到写了一半的文件
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+def write_static_js(
+    out_dir: str,
+    static_js_name: str,
+    data: Dict,
+    debug: bool = False,
+) -> None:
+    path = os.path.join(out_dir, static_js_name)
+    payload = _encode_js_assignment("__DASHBOARD_STATIC__", data)
+    _replace_file(path, payload)
+    if debug:
+        logging.debug(f"Wrote {path} size={len(payload)} bytes")
+
 def write_data_js(
     out_dir: str,
     data_js_name: str,
@@ -211,12 +266,12 @@ def write_data_js(
     debug: bool = False,
 ) -> None:
     path = os.path.join(out_dir, data_js_name)
-    with open(path, "w", encoding="utf-8") as f:
-        f.write("window.__DASHBOARD_DATA__ = ")
-        json.dump(data, f, ensure_ascii=False)
-        f.write(";")
+    payload = _encode_js_assignment("__DASHBOARD_DATA__", data)
+    _replace_file(path, payload)
     if debug:
-        logging.debug(f"Wrote {path} size={os.path.getsize(path)} bytes")
+        logging.debug(f"Wrote {path} size={len(payload)} bytes")
+
+_WQL_GPU_ADAPTER_MEMORY = "SELECT DedicatedUsage FROM Win32_PerfFormattedData_GPUPerformanceCounters_GPUAdapterMemory"
 
 def _try_gpu_adapter_memory_wmi_sum() -> Tuple[Optional[int], Optional[int]]:
     """
@@ -224,20 +279,19 @@ def _try_gpu_adapter_memory_wmi_sum() -> Tuple[Optional[int], Optional[int]]:
     基于 Win32_PerfFormattedData_GPUPerformanceCounters_GPUAdapterMemory 的 DedicatedUsage（MB）。
     总量无法通过该计数器直接获取，返回 None。
     """
-    if wmi_module is None or platform.system().lower() != "windows":
+    if get_wmi_module() is None:  # 非 Windows 时同样为 None
         return None, None
     try:
-        c = wmi_module.WMI(namespace="root\\CIMV2")
         try:
-            items = c.Win32_PerfFormattedData_GPUPerformanceCounters_GPUAdapterMemory()
+            rows = wmi_query_rows("root\\cimv2", _WQL_GPU_ADAPTER_MEMORY, ("DedicatedUsage",))
         except Exception:
-            items = []
+            rows = []
         used_mb = 0.0
-        for it in items:
+        for (du,) in rows:  # MB
+            if du is None:
+                continue
             try:
-                du = getattr(it, "DedicatedUsage", None)  # MB
-                if du is not None:
-                    used_mb += float(du)
+                used_mb += float(du)
             except Exception:
                 continue
         if used_mb > 0:
@@ -246,6 +300,236 @@ def _try_gpu_adapter_memory_wmi_sum() -> Tuple[Optional[int], Optional[int]]:
         logging.debug(f"GPU Adapter Memory(WMI) 读取失败: {e}")
     return None, None
 
+def _build_static_data(args: argparse.Namespace, sysinfo_once: Dict, swvers_once: Dict) -> Dict:
+    """
+    启动后不再变化的页面数据，写入 dashboard.static.js；前端与每周期的 data.js 合并使用。
+    """
+    return {
+        "sys_info": {
+            "os_version": sysinfo_once["os_version"],
+            "cpu_model": sysinfo_once["cpu_model"],
+            "ram_total": sysinfo_once["ram_total"],
+            "vram_total": sysinfo_once["vram_total"],
+            "disk_total": sysinfo_once["disk_total"],
+            "ram_total_h": bytes2human(sysinfo_once["ram_total"]) if sysinfo_once["ram_total"] is not None else "N/A",
+            "vram_total_h": bytes2human(sysinfo_once["vram_total"]) if sysinfo_once["vram_total"] else "N/A",
+            "disk_total_h": bytes2human(sysinfo_once["disk_total"]) if sysinfo_once["disk_total"] is not None else "N/A",
+        },
+        "sw_versions": swvers_once,
+        "rate_prefs": {
+            "auto": bool(args.rate_auto),
+            "unit": args.rate_manual_unit,
+            "type": args.rate_unit_type
+        },
+        "gauge_prefs": {
+          "freq": {"min": DEFAULT_GAUGE_FREQ_MIN, "max": DEFAULT_GAUGE_FREQ_MAX},
+          "fan":  {"min": DEFAULT_GAUGE_FAN_MIN,  "max": DEFAULT_GAUGE_FAN_MAX},
+          "temp": {"min": DEFAULT_GAUGE_TEMP_MIN, "max": DEFAULT_GAUGE_TEMP_MAX},
+          "thresholds": list(DEFAULT_GAUGE_THRESHOLDS),
+          "angles": {"start_deg": DEFAULT_GAUGE_ANGLE_START_DEG, "end_deg": DEFAULT_GAUGE_ANGLE_END_DEG}
+        },
+        "poll_ms": int(max(1, args.interval) * 1000),
+        "custom_area": DEFAULT_CUSTOM_AREA,
+    }
+
+def _cpu_series_point(t_utc_naive: datetime.datetime, v: float) -> Dict:
+    # 用整数运算生成本地 HH:MM:SS，避免 astimezone + strftime；时区偏移按该时刻取，夏令时切换也正确
+    epoch = int(t_utc_naive.replace(tzinfo=datetime.UTC).timestamp())
+    h, rem = divmod((epoch + time.localtime(epoch).tm_gmtoff) % 86400, 3600)
+    m, sec = divmod(rem, 60)
+    return {"t_label": f"{h:02d}:{m:02d}:{sec:02d}", "v": float(v)}
+
+def _sensor_tick(metrics: Metrics) -> Dict:
+    """
+    在传感器线程上执行本周期的全部 LHM 访问：统一刷新硬件节点，读取 CPU 传感器、网卡/存储速率与显存。
+    返回 {"st", "net_bps", "disk_bps", "gpu_mem"}；LHM 不可用的项为 (None, None)，由采样线程回退 psutil 等来源。
+    """
+    metrics.begin_tick()
+    st = metrics.cpu_stats()
+    net_bps, disk_bps = metrics.lhm_io_bps()
+    gpu_mem: Tuple[Optional[int], Optional[int]] = (None, None)
+    try:
+        if metrics.lhm and metrics.lhm.ok:
+            gpu_mem = metrics.lhm.gpu_mem_used_total_bytes()
+    except Exception as e:
+        logging.debug(f"LHM 显存读取失败: {e}")
+    return {"st": st, "net_bps": net_bps, "disk_bps": disk_bps, "gpu_mem": gpu_mem}
+
+def _enqueue_sample(sample_queue: "queue.Queue[Dict]", sample: Dict) -> None:
+    # 写入线程积压时丢弃最旧的一条，保证采样节拍不被阻塞
+    while True:
+        try:
+            sample_queue.put_nowait(sample)
+            return
+        except queue.Full:
+            try:
+                sample_queue.get_nowait()
+                logging.warning("写入线程积压，丢弃最旧的一条采样")
+            except queue.Empty:
+                pass
+
+def _writer_loop(
+    sample_queue: "queue.Queue[Dict]",
+    db: Optional[MariaDB],
+    args: argparse.Namespace,
+    static_data: Dict,
+    inmem_cpu_series: deque,
+    store: Optional[LocalStore] = None,
+) -> None:
+    """
+    写入线程：依次取出采样结果，执行入库、拼装页面数据并写入 data.js。
+    """
+    while True:
+        sample = sample_queue.get()
+        try:
+            _write_sample(sample, db, args, static_data, inmem_cpu_series, store)
+        except Exception as e:
+            logging.exception(f"写入过程发生异常: {e}")
+
+# process_status 行的字段顺序固定（与 INSERT 列一致），用 itemgetter 在 C 层一次取出
+_PROC_ROW_FIELDS = itemgetter("name", "instances", "cpu_percent", "mem_rss")
+
+# 数据保留清理的上次执行时间（单调时钟）；间隔由 --purge-interval 指定
+_last_purge_ts = float("-inf")
+
+def _write_sample(
+    sample: Dict,
+    db: Optional[MariaDB],
+    args: argparse.Namespace,
+    static_data: Dict,
+    inmem_cpu_series: deque,
+    store: Optional[LocalStore] = None,
+) -> None:
+    global _last_purge_ts
+    ts = sample["ts"]
+    cpu_total = sample["cpu_total"]
+    cpu_per_core = sample["cpu_per_core"]
+    st = sample["st"]
+    net = sample["net"]
+    disk = sample["disk"]
+    procs = sample["procs"]
+    top_procs = sample["top_procs"]
+
+    # CPU 曲线点在入队时即格式化，之后每次输出直接复用
+    inmem_cpu_series.append(_cpu_series_point(ts, cpu_total))
+
+    # 有数据库才入库（不写 sys_info/sw_versions）
+    if db is not None and not args.no_db:
+        # 本周期的全部写入放在同一事务中：一次连接、一次提交
+        # 时序行的 ts 通常不会重复，用 INSERT 代替 REPLACE（后者为 DELETE+INSERT）；
+        # 同一秒内重复采样时才走 ON DUPLICATE KEY UPDATE，保持“后写覆盖”的语义
+        batch: Dict[str, Tuple[str, List[Tuple]]] = {
+            "cpu_total": (
+                "INSERT INTO cpu_total (ts, percent) VALUES (%s, %s)"
+                " ON DUPLICATE KEY UPDATE percent = VALUES(percent)",
+                [(ts, encode_pct(cpu_total))],
+            ),
+            "cpu_core": (
+                "INSERT INTO cpu_core (ts, core_index, percent) VALUES (%s, %s, %s)"
+                " ON DUPLICATE KEY UPDATE percent = VALUES(percent)",
+                [(ts, i, encode_pct(v)) for i, v in enumerate(cpu_per_core)],
+            ),
+            "cpu_stats": (
+                "INSERT INTO cpu_stats (ts, freq_mhz, fan_rpm, package_temp_c) VALUES (%s, %s, %s, %s)"
+                " ON DUPLICATE KEY UPDATE freq_mhz = VALUES(freq_mhz), fan_rpm = VALUES(fan_rpm), package_temp_c = VALUES(package_temp_c)",
+                [(ts, encode_uint16(st.get("freq_mhz")), encode_uint16(st.get("fan_rpm")), encode_int8(st.get("package_temp_c")))],
+            ),
+            "net_io": (
+                "INSERT INTO net_io (ts, up_bps, down_bps) VALUES (%s, %s, %s)"
+                " ON DUPLICATE KEY UPDATE up_bps = VALUES(up_bps), down_bps = VALUES(down_bps)",
+                [(ts, net["up_bps"], net["down_bps"])],
+            ),
+            "disk_io": (
+                "INSERT INTO disk_io (ts, read_bps, write_bps) VALUES (%s, %s, %s)"
+                " ON DUPLICATE KEY UPDATE read_bps = VALUES(read_bps), write_bps = VALUES(write_bps)",
+                [(ts, disk["read_bps"], disk["write_bps"])],
+            ),
+            "process_status": (
+                "INSERT INTO process_status (ts, proc_name, instances, cpu_percent, mem_rss) VALUES (%s, %s, %s, %s, %s)"
+                " ON DUPLICATE KEY UPDATE instances = VALUES(instances), cpu_percent = VALUES(cpu_percent), mem_rss = VALUES(mem_rss)",
+                [(ts, *_PROC_ROW_FIELDS(p)) for p in (procs or [])],
+            ),
+        }
+        try:
+            db.insert_sample(batch)
+        except Exception as e:
+            logging.error(f"入库事务失败: {e}")
+
+        # 数据保留清理按独立的慢速间隔执行，无需每个周期都 DELETE
+        now_mono = time.monotonic()
+        if args.retention_minutes and args.retention_minutes > 0 and now_mono - _last_purge_ts >= args.purge_interval:
+            _last_purge_ts = now_mono
+            try:
+                db.purge_older_than(args.retention_minutes)
+                logging.debug(f"数据保留清理完成: retention_minutes={args.retention_minutes}")
+            except Exception as e:
+                logging.error(f"执行数据保留清理失败: {e}")
+
+    # 无数据库时写入本地存储（按块压缩落盘）
+    elif store is not None:
+        store.append(ts, cpu_total)
+        now_mono = time.monotonic()
+        if args.retention_minutes and args.retention_minutes > 0 and now_mono - _last_purge_ts >= args.purge_interval:
+            _last_purge_ts = now_mono
+            try:
+                store.purge_older_than(args.retention_minutes)
+            except Exception as e:
+                logging.error(f"本地存储保留清理失败: {e}")
+
+    # 构建 CPU 曲线：内存环形缓冲（启动时已从 DB/本地存储恢复历史）
+    series: List[Dict] = list(inmem_cpu_series)
+
+    # 生成页面数据（每周期变化的部分）
+    data = {
+        "cpu_total_series": series,
+        "cores": [{"index": i, "percent": float(v)} for i, v in enumerate(cpu_per_core)],
+        "stats": {
+            "freq_mhz": st.get("freq_mhz"),
+            "fan_rpm": st.get("fan_rpm"),
+            "package_temp_c": st.get("package_temp_c"),
+        },
+        "net": net,
+        "disk": disk,
+        # 仅动态部分；系统信息/软件版本/显示偏好在 dashboard.static.js 中
+        "sys_info": {
+            "mem_usage_line": None,
+            "vram_usage_line": None,
+            "disk_usage_line": None,
+        },
+        "processes": procs,
+        "top_procs": top_procs,
+        "generated_at": f"{ts.strftime('%Y-%m-%d %H:%M:%S')} UTC",
+    }
+
+    # 三项动态使用情况由采样线程预先计算
+    data["sys_info"].update(sample["usage"])
+
+    # 写入 data.js
+    try:
+        write_data_js(args.out_dir, args.data_js_name, data, debug=args.debug)
+        logging.info("所有数据写入到 data.js 成功")
+    except Exception as e:
+        logging.error(f"写入 data.js 失败: {e}")
+
+    # 确保静态资源存在/按需覆盖（仅在尚未写出或收到 SIGHUP 后执行）
+    if _assets_written:
+        return
+    try:
+        ensure_files(
+            out_dir=args.out_dir,
+            html_name=args.html_name,
+            js_name=args.js_name,
+            overwrite=args.overwrite_assets,
+            debug=args.debug,
+            html_template_path=args.html_template,
+            js_template_path=args.js_template,
+            chart_js_path=args.chart_js,
+        )
+        write_static_js(args.out_dir, args.static_js_name, static_data, debug=args.debug)
+        logging.debug("静态资源校验/写入完成")
+    except Exception as e:
+        logging.error(f"写入静态资源失败: {e}")
+
 def main():
     parser = argparse.ArgumentParser(description="服务器硬件/进程监控（NVML/WMI + MariaDB + 静态仪表盘）")
     parser.add_argument("--db-host", default=DEFAULT_DB_HOST)
@@ -253,11 +537,13 @@ def main():
     parser.add_argument("--db-user", default=DEFAULT_DB_USER)
     parser.add_argument("--db-pass", default=DEFAULT_DB_PASS)
     parser.add_argument("--db-name", default=DEFAULT_DB_NAME)
+    parser.add_argument("--db-page-compression", action="store_true", default=DEFAULT_DB_PAGE_COMPRESSION, help="时序表启用 InnoDB 页压缩")
 
     parser.add_argument("--out-dir", default=DEFAULT_OUT_DIR)
     parser.add_argument("--html-name", default=DEFAULT_HTML_NAME)
     parser.add_argument("--js-name", default=DEFAULT_JS_NAME)
     parser.add_argument("--data-js-name", default=DEFAULT_DATA_JS_NAME)
+    parser.add_argument("--static-js-name", default=DEFAULT_STATIC_JS_NAME)
 
     # Web 服务器路径，用于辅助识别（仅用于文件版本读取，不执行命令）
     parser.add_argument("--web-server-path", default=DEFAULT_WEB_SERVER_PATH, help="Web 服务器路径（可执行文件或目录），留空则自动从系统检测（不执行命令）")
@@ -281,9 +567,11 @@ def main():
     # 启动清空历史 & 数据保留分钟数（<=0 禁用自动清理）
     parser.add_argument("--wipe-on-start", action="store_true", default=DEFAULT_WIPE_ON_START, help="启动时清空历史数据")
     parser.add_argument("--retention-minutes", type=int, default=DEFAULT_RETENTION_MINUTES, help="数据保留时长（分钟，<=0 表示不清理）")
+    parser.add_argument("--purge-interval", type=int, default=DEFAULT_PURGE_INTERVAL_S, help="数据保留清理的执行间隔（秒）")
 
     # 禁用数据库，仅显示不入库
     parser.add_argument("--no-db", action="store_true", default=DEFAULT_DISABLE_DB, help="禁用数据库，仅生成前端数据，不入库")
+    parser.add_argument("--local-store", default=DEFAULT_LOCAL_STORE_PATH, help="未启用数据库时的本地时序存储（SQLite 文件路径），留空不启用")
 
     args = parser.parse_args()
     setup_logger(args.debug)
@@ -301,8 +589,6 @@ def main():
         except Exception as e:
             logging.error(f"导出 psutil 线程快照失败: {e}")
 
-    install_signal_handlers()
-
     # 启动时检查并输出逻辑 CPU 线程数
     try:
         ncpu_start = max(1, int(psutil.cpu_count(logical=True) or os.cpu_count() or 1))
@@ -319,7 +605,8 @@ def main():
         logging.info("数据库未启用（仅显示模式）")
     else:
         try:
-            db = MariaDB(args.db_host, args.db_port, args.db_user, args.db_pass, args.db_name, debug=args.debug)
+            db = MariaDB(args.db_host, args.db_port, args.db_user, args.db_pass, args.db_name, debug=args.debug,
+                         page_compression=args.db_page_compression)
             logging.info("数据库已连接")
             if args.wipe_on_start:
                 logging.info("启动清空历史数据（TRUNCATE 所有业务表）")
@@ -340,6 +627,7 @@ def main():
     )
 
     metrics = Metrics(proc_names, debug=args.debug)
+    atexit.register(metrics.close)
 
     # 启动时仅探测一次硬件/软件版本，并可选入库
     startup_ts = now_utc().replace(microsecond=0)
@@ -350,7 +638,9 @@ def main():
     if db is not None and not args.no_db:
         try:
             db.insert_one(
-                "REPLACE INTO sys_info (ts, os_version, cpu_model, ram_total, vram_total, disk_total) VALUES (%s, %s, %s, %s, %s, %s)",
+                "INSERT INTO sys_info (ts, os_version, cpu_model, ram_total, vram_total, disk_total) VALUES (%s, %s, %s, %s, %s, %s)"
+                " ON DUPLICATE KEY UPDATE os_version = VALUES(os_version), cpu_model = VALUES(cpu_model), ram_total = VALUES(ram_total),"
+                " vram_total = VALUES(vram_total), disk_total = VALUES(disk_total)",
                 (
                     startup_ts,
                     sysinfo_once["os_version"],
@@ -362,16 +652,77 @@ def main():
             )
             logging.debug("探测信息入库: sys_info")
             db.insert_one(
-                "REPLACE INTO sw_versions (ts, nginx, java, python_cuda) VALUES (%s, %s, %s, %s)",
+                "INSERT INTO sw_versions (ts, nginx, java, python_cuda) VALUES (%s, %s, %s, %s)"
+                " ON DUPLICATE KEY UPDATE nginx = VALUES(nginx), java = VALUES(java), python_cuda = VALUES(python_cuda)",
                 (startup_ts, swvers_once["nginx"], swvers_once["java"], swvers_once["python_cuda"]),
             )
             logging.debug("探测信息入库: sw_versions")
         except Exception as e:
             logging.error(f"探测信息入库失败: {e}")
 
-    # 仅显示模式：内存环形缓冲，保留近10分钟曲线
+    # CPU 曲线：内存环形缓冲（已格式化的点），保留近10分钟
     cpu_hist_len = max(12, int(600 / max(1, args.interval)))
-    inmem_cpu_series = deque(maxlen=cpu_hist_len)
+    inmem_cpu_series: deque = deque(maxlen=cpu_hist_len)
+    # 有数据库时仅在启动时读取一次近10分钟历史，重启后曲线不中断
+    # 起始时间与写入的 ts 同样在 Python 侧生成并绑定，不依赖数据库服务器的时钟
+    if db is not None:
+        try:
+            cpu10 = db.query_iter(
+                "SELECT ts, percent FROM cpu_total WHERE ts >= %s ORDER BY ts ASC",
+                (now_utc().replace(microsecond=0) - datetime.timedelta(minutes=10),),
+            )
+            inmem_cpu_series.extend(_cpu_series_point(t, decode_pct(v)) for t, v in cpu10)
+        except Exception as e:
+            logging.error(f"读取 CPU 历史曲线失败: {e}")
+
+    # 无数据库（禁用或连接失败）时可改用本地存储保存 CPU 曲线
+    store: Optional[LocalStore] = None
+    if db is None and args.local_store:
+        try:
+            # 约每分钟落盘一块；异常退出时最多丢失最近一分钟
+            store = LocalStore(args.local_store, chunk_size=max(1, int(60 / max(1, args.interval))), debug=args.debug)
+            atexit.register(store.close)
+            if args.wipe_on_start:
+                store.wipe_all()
+            else:
+                since = now_utc() - datetime.timedelta(minutes=10)
+                inmem_cpu_series.extend(_cpu_series_point(t, v) for t, v in store.iter_since(since))
+            logging.info(f"本地存储已启用: {args.local_store}")
+        except Exception as e:
+            logging.error(f"本地存储初始化失败，不保存历史：{e}")
+            store = None
+
+    # 启动后不变的页面数据只写一次
+    static_data = _build_static_data(args, sysinfo_once, swvers_once)
+    try:
+        write_static_js(args.out_dir, args.static_js_name, static_data, debug=args.debug)
+    except Exception as e:
+        logging.error(f"写入 {args.static_js_name} 失败: {e}")
+
+    # 写入线程：采样线程只负责采集，入库与文件写入在后台进行（有界队列，积压时丢弃最旧数据）
+    sample_queue: "queue.Queue[Dict]" = queue.Queue(maxsize=4)
+    threading.Thread(
+        target=_writer_loop,
+        args=(sample_queue, db, args, static_data, inmem_cpu_series, store),
+        name="data-writer",
+        daemon=True,
+    ).start()
+
+    # TOP 10 预热：psutil.process_iter 会跨调用复用 Process 实例，
+    # 先对现有进程调用一次 cpu_percent，首个周期即可得到真实增量
+    for p in psutil.process_iter():
+        try:
+            p.cpu_percent(interval=None)
+        except Exception:
+            continue
+    top_prev_wall = time.time()
+
+    # 传感器线程：固定单线程，LHM 调用互不并发，WMI 线程连接也可跨周期复用
+    sensor_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sensor")
+
+    # 循环内不变的量：逻辑 CPU 数（进程 CPU% 归一化）与启动时探测的显存总量
+    inv_ncpu = 1.0 / metrics.ncpu
+    vram_total = sysinfo_once.get("vram_total") or 0
 
     # 循环
     while True:
@@ -380,6 +731,11 @@ def main():
             ts = now_utc().replace(microsecond=0)
 
             # 采集（仅动态数据）
+            # LHM 硬件节点刷新与传感器/速率/显存读取耗时最长，整体交给传感器线程，
+            # 与下面的 CPU 占用采集和进程枚举重叠执行；采样线程在 f_stats.result() 之前不访问 LHM，
+            # 网络/磁盘速率在汇合之后用 LHM 读数计算（缺失时回退 psutil）
+            f_stats = sensor_pool.submit(_sensor_tick, metrics)
+
             try:
                 cpu_total, cpu_per_core = metrics.collect_cpu()
                 logging.debug(f"采集完成: CPU 总体={cpu_total:.2f}% 核心数={len(cpu_per_core)}")
@@ -387,29 +743,15 @@ def main():
                 logging.error(f"采集 CPU 数据失败: {e}")
                 cpu_total, cpu_per_core = 0.0, []
 
+            # 本周期只枚举一次进程，供进程检测与 TOP 10 共用
             try:
-                st = metrics.cpu_stats()
-                logging.debug(f"采集完成: CPU 传感器 freq={st.get('freq_mhz')}MHz fan={st.get('fan_rpm')}RPM temp={st.get('package_temp_c')}C")
+                proc_snapshot = metrics.process_snapshot()
             except Exception as e:
-                logging.error(f"采集 CPU 传感器失败: {e}")
-                st = {"freq_mhz": None, "fan_rpm": None, "package_temp_c": None}
-
-            try:
-                net = metrics.net_io_rates()
-                logging.debug(f"采集完成: 网络 up={net.get('up_bps')}bps down={net.get('down_bps')}bps")
-            except Exception as e:
-                logging.error(f"采集 网络数据失败: {e}")
-                net = {"up_bps": 0, "down_bps": 0}
+                logging.error(f"枚举进程失败: {e}")
+                proc_snapshot = []
 
             try:
-                disk = metrics.disk_io_rates()
-                logging.debug(f"采集完成: 磁盘 read={disk.get('read_bps')}bps write={disk.get('write_bps')}bps")
-            except Exception as e:
-                logging.error(f"采集 磁盘数据失败: {e}")
-                disk = {"read_bps": 0, "write_bps": 0}
-
-            try:
-                procs = metrics.process_status()
+                procs = metrics.process_status(proc_snapshot)
                 logging.debug(f"采集完成: 进程检测 项数={len(procs)}")
             except Exception as e:
                 logging.error(f"采集 进程检测失败: {e}")
@@ -418,226 +760,138 @@ def main():
             # 计算 CPU 占用 TOP 10
             top_procs: List[Dict] = []
             try:
-                ncpu = getattr(metrics, "ncpu", None) or max(1, int(psutil.cpu_count(logical=True) or os.cpu_count() or 1))
-                items: List[Tuple[float, Dict]] = []
-                for p in psutil.process_iter(attrs=["pid", "name", "exe"]):
+                items: List[Tuple[float, int, psutil.Process]] = []
+                now_wall = time.time()
+                for p in proc_snapshot:
                     try:
                         pid_val = int(p.info.get("pid") or 0)
                         if pid_val == 0:
                             continue  # 屏蔽 System Idle Process
-                        cpu_raw = float(p.cpu_percent(interval=None))
+                        # oneshot：CPU 时间相关读取合并为一次系统查询
+                        with p.oneshot():
+                            cpu_raw = float(p.cpu_percent(interval=None))
+                            ctime = p.info.get("create_time")
+                            if ctime and ctime >= top_prev_wall and now_wall > ctime:
+                                # 上次采样后新启动的进程首次 cpu_percent 恒为 0，改用其存活期内的平均占用
+                                ct = p.cpu_times()
+                                cpu_raw = (ct.user + ct.system) * 100.0 / (now_wall - ctime)
+                        items.append((cpu_raw * inv_ncpu, pid_val, p))
+                    except Exception:
+                        continue
+                # 部分排序只取前 10；内存与展示字段只为入选进程读取。
+                # 入选进程读取失败（已退出/拒绝访问）时改用完整排序，从第 11 名起继续补足 10 个
+                ranked = nlargest(10, items, key=itemgetter(0))
+                full_sorted = False
+                i = 0
+                while len(top_procs) < 10:
+                    if i >= len(ranked):
+                        if full_sorted or len(ranked) == len(items):
+                            break
+                        # 与 nlargest 的前 10 名顺序一致（同为稳定的降序排序），i 无需回退
+                        ranked = sorted(items, key=itemgetter(0), reverse=True)
+                        full_sorted = True
+                        continue
+                    cpu_norm, pid_val, p = ranked[i]
+                    i += 1
+                    try:
                         mem_rss = int(p.memory_info().rss)
-                        cpu_norm = cpu_raw / float(ncpu)
-                        items.append((cpu_norm, {
-                            "pid": pid_val,
-                            "name": p.info.get("name") or "",
-                            "exe": p.info.get("exe") or "",
-                            "cpu_percent": float(cpu_norm),
-                            "mem_rss": mem_rss,
-                        }))
                     except Exception:
                         continue
-                items.sort(key=lambda t: t[0], reverse=True)
-                top_procs = [it[1] for it in items[:10]]
+                    top_procs.append({
+                        "pid": pid_val,
+                        "name": p.info.get("name") or "",
+                        "exe": p.info.get("exe") or "",
+                        "cpu_percent": float(cpu_norm),
+                        "mem_rss": mem_rss,
+                    })
+                top_prev_wall = now_wall
                 logging.debug(f"采集完成: TOP_PROCS 数量={len(top_procs)}")
             except Exception as e:
                 logging.error(f"采集 TOP_PROCS 失败: {e}")
                 top_procs = []
 
-            # 无数据库：仅显示，保存到内存曲线
-            inmem_cpu_series.append((ts, cpu_total))
-
-            # 有数据库才入库（不写 sys_info/sw_versions）
-            if db is not None and not args.no_db:
-                try:
-                    db.insert_one("REPLACE INTO cpu_total (ts, percent) VALUES (%s, %s)", (ts, cpu_total))
-                    logging.debug("入库成功: cpu_total")
-                except Exception as e:
-                    logging.error(f"入库失败: cpu_total - {e}")
-
-                try:
-                    db.insert_many(
-                        "REPLACE INTO cpu_core (ts, core_index, percent) VALUES (%s, %s, %s)",
-                        [(ts, i, v) for i, v in enumerate(cpu_per_core)],
-                    )
-                    logging.debug("入库成功: cpu_core")
-                except Exception as e:
-                    logging.error(f"入库失败: cpu_core - {e}")
-
-                try:
-                    db.insert_one(
-                        "REPLACE INTO cpu_stats (ts, freq_mhz, fan_rpm, package_temp_c) VALUES (%s, %s, %s, %s)",
-                        (ts, st.get("freq_mhz"), st.get("fan_rpm"), st.get("package_temp_c")),
-                    )
-                    logging.debug("入库成功: cpu_stats")
-                except Exception as e:
-                    logging.error(f"入库失败: cpu_stats - {e}")
-
-                try:
-                    db.insert_one("REPLACE INTO net_io (ts, up_bps, down_bps) VALUES (%s, %s, %s)", (ts, net["up_bps"], net["down_bps"]))
-                    logging.debug("入库成功: net_io")
-                except Exception as e:
-                    logging.error(f"入库失败: net_io - {e}")
+            # 汇合传感器结果
+            lhm_gpu_mem: Tuple[Optional[int], Optional[int]] = (None, None)
+            lhm_net_bps: Tuple[Optional[float], Optional[float]] = (None, None)
+            lhm_disk_bps: Tuple[Optional[float], Optional[float]] = (None, None)
+            try:
+                sensed = f_stats.result()
+                st = sensed["st"]
+                lhm_net_bps, lhm_disk_bps, lhm_gpu_mem = sensed["net_bps"], sensed["disk_bps"], sensed["gpu_mem"]
+                logging.debug(f"采集完成: CPU 传感器 freq={st.get('freq_mhz')}MHz fan={st.get('fan_rpm')}RPM temp={st.get('package_temp_c')}C")
+            except Exception as e:
+                logging.error(f"采集 CPU 传感器失败: {e}")
+                st = {"freq_mhz": None, "fan_rpm": None, "package_temp_c": None}
 
-                try:
-                    db.insert_one("REPLACE INTO disk_io (ts, read_bps, write_bps) VALUES (%s, %s, %s)", (ts, disk["read_bps"], disk["write_bps"]))
-                    logging.debug("入库成功: disk_io")
-                except Exception as e:
-                    logging.error(f"入库失败: disk_io - {e}")
+            try:
+                net = metrics.net_io_rates(lhm_net_bps)
+                logging.debug(f"采集完成: 网络 up={net.get('up_bps')}bps down={net.get('down_bps')}bps")
+            except Exception as e:
+                logging.error(f"采集 网络数据失败: {e}")
+                net = {"up_bps": 0, "down_bps": 0}
 
-                if procs:
-                    try:
-                        db.insert_many(
-                            "REPLACE INTO process_status (ts, proc_name, instances, cpu_percent, mem_rss) VALUES (%s, %s, %s, %s, %s)",
-                            [(ts, p["name"], p["instances"], p["cpu_percent"], p["mem"] if "mem" in p else p["mem_rss"]) for p in procs],
-                        )
-                        logging.debug("入库成功: process_status")
-                    except Exception as e:
-                        logging.error(f"入库失败: process_status - {e}")
-
-                if args.retention_minutes and args.retention_minutes > 0:
-                    try:
-                        db.purge_older_than(args.retention_minutes)
-                        logging.debug(f"数据保留清理完成: retention_minutes={args.retention_minutes}")
-                    except Exception as e:
-                        logging.error(f"执行数据保留清理失败: {e}")
-
-            # 构建 CPU 曲线：优先 DB，若无则用内存
-            series: List[Dict] = []
-            if db is not None:
-                cpu10 = db.query(
-                    "SELECT ts, percent FROM cpu_total WHERE ts >= (UTC_TIMESTAMP() - INTERVAL 10 MINUTE) ORDER BY ts ASC"
-                )
-                for row in cpu10:
-                    t_utc_naive = row["ts"]
-                    t_local = t_utc_naive.replace(tzinfo=datetime.UTC).astimezone()
-                    label = t_local.strftime("%H:%M:%S")
-                    series.append({"t_label": label, "v": float(row["percent"])})
-            else:
-                for t_utc_naive, v in inmem_cpu_series:
-                    t_local = t_utc_naive.replace(tzinfo=datetime.UTC).astimezone()
-                    label = t_local.strftime("%H:%M:%S")
-                    series.append({"t_label": label, "v": float(v)})
-
-            # 生成页面数据
-            data = {
-                "cpu_total_series": series,
-                "cores": [{"index": i, "percent": float(v)} for i, v in enumerate(cpu_per_core)],
-                "stats": {
-                    "freq_mhz": st.get("freq_mhz"),
-                    "fan_rpm": st.get("fan_rpm"),
-                    "package_temp_c": st.get("package_temp_c"),
-                },
-                "net": net,
-                "disk": disk,
-                "sys_info": {
-                    "os_version": sysinfo_once["os_version"],
-                    "cpu_model": sysinfo_once["cpu_model"],
-                    "ram_total": sysinfo_once["ram_total"],
-                    "vram_total": sysinfo_once["vram_total"],
-                    "disk_total": sysinfo_once["disk_total"],
-                    "ram_total_h": bytes2human(sysinfo_once["ram_total"]) if sysinfo_once["ram_total"] is not None else "N/A",
-                    "vram_total_h": bytes2human(sysinfo_once["vram_total"]) if sysinfo_once["vram_total"] else "N/A",
-                    "disk_total_h": bytes2human(sysinfo_once["disk_total"]) if sysinfo_once["disk_total"] is not None else "N/A",
-                    "mem_usage_line": None,
-                    "vram_usage_line": None,
-                    "disk_usage_line": None,
-                },
-                "sw_versions": swvers_once,
-                "processes": procs,
-                "rate_prefs": {
-                    "auto": bool(args.rate_auto),
-                    "unit": args.rate_manual_unit,
-                    "type": args.rate_unit_type
-                },
-                "gauge_prefs": {
-                  "freq": {"min": DEFAULT_GAUGE_FREQ_MIN, "max": DEFAULT_GAUGE_FREQ_MAX},
-                  "fan":  {"min": DEFAULT_GAUGE_FAN_MIN,  "max": DEFAULT_GAUGE_FAN_MAX},
-                  "temp": {"min": DEFAULT_GAUGE_TEMP_MIN, "max": DEFAULT_GAUGE_TEMP_MAX},
-                  "thresholds": list(DEFAULT_GAUGE_THRESHOLDS),
-                  "angles": {"start_deg": DEFAULT_GAUGE_ANGLE_START_DEG, "end_deg": DEFAULT_GAUGE_ANGLE_END_DEG}
-                },
-                "poll_ms": int(max(1, args.interval) * 1000),
-                "top_procs": top_procs,
-                "custom_area": DEFAULT_CUSTOM_AREA,
-                "generated_at": f"{ts.strftime('%Y-%m-%d %H:%M:%S')} UTC",
-            }
+            try:
+                disk = metrics.disk_io_rates(lhm_disk_bps)
+                logging.debug(f"采集完成: 磁盘 read={disk.get('read_bps')}bps write={disk.get('write_bps')}bps")
+            except Exception as e:
+                logging.error(f"采集 磁盘数据失败: {e}")
+                disk = {"read_bps": 0, "write_bps": 0}
 
-            # ——— 三项动态使用情况 ———
+            # ——— 三项动态使用情况（在采样线程读取，写入线程只负责拼装） ———
+            usage: Dict[str, Optional[str]] = {}
             # 1) 内存
             try:
                 vm = psutil.virtual_memory()
                 mem_used_b = int(vm.used)
                 mem_pct = int(round(vm.percent))
-                data["sys_info"]["mem_usage_line"] = f"{bytes2human(mem_used_b)} ({mem_pct}%)"
+                usage["mem_usage_line"] = f"{bytes2human(mem_used_b)} ({mem_pct}%)"
             except Exception:
-                data["sys_info"]["mem_usage_line"] = "N/A"
+                usage["mem_usage_line"] = "N/A"
 
             # 2) 存储
             try:
-                disk_total_dyn = 0
-                disk_used_dyn = 0
-                for p in psutil.disk_partitions(all=False):
-                    if p.fstype and p.mountpoint:
-                        try:
-                            u = psutil.disk_usage(p.mountpoint)
-                            disk_total_dyn += int(u.total)
-                            disk_used_dyn += int(u.used)
-                        except Exception:
-                            continue
+                disk_total_dyn, disk_used_dyn = metrics.disk_usage_totals()
                 if disk_total_dyn > 0:
                     disk_pct = int(round(disk_used_dyn * 100.0 / disk_total_dyn))
-                    data["sys_info"]["disk_usage_line"] = f"{bytes2human(disk_used_dyn)} ({disk_pct}%)"
+                    usage["disk_usage_line"] = f"{bytes2human(disk_used_dyn)} ({disk_pct}%)"
                 else:
-                    data["sys_info"]["disk_usage_line"] = "N/A"
+                    usage["disk_usage_line"] = "N/A"
             except Exception:
-                data["sys_info"]["disk_usage_line"] = "N/A"
+                usage["disk_usage_line"] = "N/A"
 
             # 3) 显存（优先 LHM，其次 NVML，其次 Windows GPU 计数器）
             try:
                 used_b = None
                 total_b_dyn = None
-                if metrics.lhm and metrics.lhm.ok:
-                    u, t = metrics.lhm.gpu_mem_used_total_bytes()
-                    used_b, total_b_dyn = u, t
+                used_b, total_b_dyn = lhm_gpu_mem
                 if used_b is None:
                     u2, t2 = metrics.nvml.gpu_mem_sum()
                     used_b = used_b or u2
                     total_b_dyn = total_b_dyn or t2
                 if used_b is None:
                     used_b, _ = _try_gpu_adapter_memory_wmi_sum()
-                denom = (sysinfo_once.get("vram_total") or total_b_dyn or 0)
+                denom = (vram_total or total_b_dyn or 0)
                 if used_b is not None and denom > 0:
                     used_clip = min(int(used_b), int(denom))
                     vram_pct = int(round(used_clip * 100.0 / int(denom)))
-                    data["sys_info"]["vram_usage_line"] = f"{bytes2human(used_clip)} ({vram_pct}%)"
+                    usage["vram_usage_line"] = f"{bytes2human(used_clip)} ({vram_pct}%)"
                 else:
-                    data["sys_info"]["vram_usage_line"] = "N/A"
+                    usage["vram_usage_line"] = "N/A"
             except Exception:
-                data["sys_info"]["vram_usage_line"] = "N/A"
-
-            # 写入 data.js
-            try:
-                write_data_js(args.out_dir, args.data_js_name, data, debug=args.debug)
-                logging.info("所有数据写入到 data.js 成功")
-            except Exception as e:
-                logging.error(f"写入 data.js 失败: {e}")
-
-            # 确保静态资源存在/按需覆盖
-            try:
-                ensure_files(
-                    out_dir=args.out_dir,
-                    html_name=args.html_name,
-                    js_name=args.js_name,
-                    overwrite=args.overwrite_assets,
-                    debug=args.debug,
-                    html_template_path=args.html_template,
-                    js_template_path=args.js_template,
-                    chart_js_path=args.chart_js,
-                )
-                logging.debug("静态资源校验/写入完成")
-            except Exception as e:
-                logging.error(f"写入静态资源失败: {e}")
+                usage["vram_usage_line"] = "N/A"
+
+            # 交给写入线程：入库、拼装页面数据、写文件不再阻塞下一次采样
+            _enqueue_sample(sample_queue, {
+                "ts": ts,
+                "cpu_total": cpu_total,
+                "cpu_per_core": cpu_per_core,
+                "st": st,
+                "net": net,
+                "disk": disk,
+                "procs": procs,
+                "top_procs": top_procs,
+                "usage": usage,
+            })
         except Exception as e:
             logging.exception(f"采集/写入过程发生异常: {e}")
         finally:
@@ -15,6 +15,8 @@ DEFAULT_DB_PORT = 3306
 DEFAULT_DB_USER = "username?"
 DEFAULT_DB_PASS = "password?"
 DEFAULT_DB_NAME = "server_monitor_app"
+# 时序表启用 InnoDB 页压缩（MariaDB PAGE_COMPRESSED，需 innodb_file_per_table，文件系统支持稀疏文件）
+DEFAULT_DB_PAGE_COMPRESSION = False
 
 # 文件输出目录及文件名
 # example: r"L:\nginx-1.28.0\html\server_info", So,you can access it via "http://localhost/server_info"
@@ -22,6 +24,7 @@ DEFAULT_OUT_DIR = r""
 DEFAULT_HTML_NAME = "index.html"
 DEFAULT_JS_NAME = "dashboard.js"
 DEFAULT_DATA_JS_NAME = "data.js"
+DEFAULT_STATIC_JS_NAME = "dashboard.static.js"  # 启动后不变的页面数据（系统信息/软件版本/显示偏好），仅写一次
 
 # Web 服务器路径（可执行文件或目录），用于辅助识别；留空表示自动从 PATH/系统检测（本版不再执行外部命令，仅用于文件版本读取）
 # example: r"L:\nginx-1.28.0",其中包含 nginx.exe
@@ -37,6 +40,12 @@ DEFAULT_INTERVAL = 5
 # 启动清空历史 & 数据保留分钟数（<=0 禁用自动清理）
 DEFAULT_WIPE_ON_START = True
 DEFAULT_RETENTION_MINUTES = 60
+# 数据保留清理的执行间隔（秒），与采样周期无关
+DEFAULT_PURGE_INTERVAL_S = 60
+
+# 未启用数据库时的本地时序存储（SQLite 文件路径，留空表示不启用）；CPU 曲线按块压缩存储，重启后可恢复
+# example: r"L:\server_info\monitor.sqlite3"
+DEFAULT_LOCAL_STORE_PATH = r""
 
 # 速率显示偏好：
 DEFAULT_RATE_AUTO_SCALE = True  # 自动缩放单位
@@ -1,6 +1,127 @@
-﻿import logging
+﻿import datetime
+import functools
+import logging
 import pymysql
-from typing import List, Tuple, Dict, Optional
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple, Dict, Optional
+
+# 数据库驱动：优先使用 mysqlclient（MySQLdb，libmysqlclient 的 C 扩展，协议解析与行解码不经过 Python 字节码），
+# 未安装时回退到纯 Python 的 PyMySQL；两者均为 DB-API 2.0，连接参数与游标用法一致
+try:
+    import MySQLdb as _drv  # type: ignore
+    import MySQLdb.cursors  # type: ignore  # noqa: F401
+except Exception:
+    _drv = pymysql
+DB_DRIVER = _drv.__name__
+
+# 全部业务表；其中时序表按 ts 做 RANGE 分区，过期数据整分区 DROP，避免逐行 DELETE
+_ALL_TABLES = ("cpu_total", "cpu_core", "cpu_stats", "net_io", "disk_io", "sys_info", "sw_versions", "process_status")
+_PARTITIONED_TABLES = ("cpu_total", "cpu_core", "cpu_stats", "net_io", "disk_io", "process_status")
+# 分区跨度候选（分钟，均整除一天，边界与整点对齐）；按保留时长约 1/6 选取，分区数保持在十个以内
+_PARTITION_SPANS_MIN = (10, 15, 30, 60, 120, 180, 360, 720, 1440)
+_PARTITIONS_AHEAD = 3  # 预建的未来分区数
+_PURGE_BATCH_ROWS = 10000  # 单条 DELETE 的行数上限，积压较多时分批删除，避免长事务
+_INSERT_CHUNK_ROWS = 512  # 单条多行 INSERT 的行数上限，控制语句长度（远低于 max_allowed_packet）
+
+def _to_seconds(dt: datetime.datetime) -> int:
+    # 与 MariaDB TO_SECONDS() 一致：自公元 0 年起的秒数
+    return (dt.toordinal() + 365) * 86400 + dt.hour * 3600 + dt.minute * 60 + dt.second
+
+def _partition_name(bound: int) -> str:
+    # 以分区上界时间命名，如 p202610151500
+    days, secs = divmod(bound, 86400)
+    dt = datetime.datetime.fromordinal(days - 365) + datetime.timedelta(seconds=secs)
+    return dt.strftime("p%Y%m%d%H%M")
+
+def _partition_span_seconds(retention_minutes: int) -> int:
+    for span in _PARTITION_SPANS_MIN:
+        if span * 6 >= retention_minutes:
+            return span * 60
+    return _PARTITION_SPANS_MIN[-1] * 60
+
+# 连接丢失的错误码：2006 server has gone away / 2013 lost connection during query / 2055 lost connection（系统错误）
+# 驱动把多数服务端错误（未知列、权限不足、锁等待超时、死锁等）也映射为 OperationalError，这些不应触发重连
+_CONN_LOST_ERRNOS = frozenset((2006, 2013, 2055))
+
+def _is_conn_lost(e: BaseException) -> bool:
+    """持久连接已失效、需要丢弃后重连的错误：InterfaceError（连接已关闭）或上述连接丢失错误码。"""
+    if isinstance(e, _drv.InterfaceError):
+        return True
+    if isinstance(e, _drv.OperationalError):
+        return bool(e.args) and e.args[0] in _CONN_LOST_ERRNOS
+    return False
+
+@functools.lru_cache(maxsize=64)
+def _split_insert(sql: str) -> Optional[Tuple[str, str, str]]:
+    """
+    把 "INSERT/REPLACE ... VALUES (...) [ON DUPLICATE ...]" 拆成 (前缀, 单行占位, 后缀)；
+    其它形式返回 None（只能逐行执行）。按模板缓存，避免每次写入都重新跑正则。
+    """
+    # 仅借用 PyMySQL 的语句解析正则，实际执行走当前驱动
+    m = pymysql.cursors.RE_INSERT_VALUES.match(sql)
+    if m is None:
+        return None
+    return m.group(1), m.group(2).rstrip(), m.group(3) or ""
+
+@functools.lru_cache(maxsize=256)
+def _multi_row_sql(sql: str, n: int) -> Optional[str]:
+    # 预拼好 n 行的多行 INSERT 模板（%s 位置参数），按 (模板, 行数) 缓存
+    parts = _split_insert(sql)
+    if parts is None:
+        return None
+    prefix, values, postfix = parts
+    return prefix + ",".join((values,) * n) + postfix
+
+def _execute_rows(cur, sql: str, rows: List[Tuple]) -> int:
+    """
+    以预拼好的多行 INSERT 写入 rows（超过 _INSERT_CHUNK_ROWS 时分段），参数直接展平后 execute，
+    不经过 executemany 的逐次正则解析与逐行 mogrify 拼接；无法合并的语句退回 executemany。
+    """
+    if _split_insert(sql) is None:
+        logging.debug(f"executemany 将逐行执行（无法合并为多行 INSERT）: {sql}")
+        return cur.executemany(sql, rows) or 0
+    affected = 0
+    for i in range(0, len(rows), _INSERT_CHUNK_ROWS):
+        chunk = rows[i:i + _INSERT_CHUNK_ROWS]
+        affected += cur.execute(_multi_row_sql(sql, len(chunk)), [v for row in chunk for v in row])
+    return affected
+
+@functools.lru_cache(maxsize=32)
+def _row_type(fields: Tuple[str, ...]):
+    # 按列名组合缓存 namedtuple 类型；非法标识符（如 "VERSION()"）自动改名为 _0、_1 ...
+    return namedtuple("Row", fields, rename=True)
+
+# 旧版本 FLOAT 列 -> (列名, 新类型, 由旧值换算的表达式, NULL 约束)
+_LEGACY_FLOAT_COLUMNS = {
+    "cpu_total": [("percent", "SMALLINT UNSIGNED", "LEAST(GREATEST(percent, 0), 100) * 10", "NOT NULL")],
+    "cpu_core": [("percent", "SMALLINT UNSIGNED", "LEAST(GREATEST(percent, 0), 100) * 10", "NOT NULL")],
+    "cpu_stats": [
+        ("freq_mhz", "SMALLINT UNSIGNED", "LEAST(GREATEST(freq_mhz, 0), 65535)", "NULL"),
+        ("fan_rpm", "SMALLINT UNSIGNED", "LEAST(GREATEST(fan_rpm, 0), 65535)", "NULL"),
+        ("package_temp_c", "TINYINT", "LEAST(GREATEST(package_temp_c, -128), 127)", "NULL"),
+    ],
+}
+
+# 紧凑列编码：百分比以 SMALLINT UNSIGNED 存储（×10，保留一位小数），频率/转速为 SMALLINT UNSIGNED，温度为 TINYINT
+def encode_pct(v: Optional[float]) -> Optional[int]:
+    if v is None:
+        return None
+    return min(1000, max(0, int(round(float(v) * 10))))
+
+def decode_pct(v: Optional[int]) -> Optional[float]:
+    return None if v is None else v / 10.0
+
+def encode_uint16(v: Optional[float]) -> Optional[int]:
+    if v is None:
+        return None
+    return min(65535, max(0, int(round(float(v)))))
+
+def encode_int8(v: Optional[float]) -> Optional[int]:
+    if v is None:
+        return None
+    return min(127, max(-128, int(round(float(v)))))
 
 class MariaDB:
     def __init__(
@@ -11,6 +132,7 @@ class MariaDB:
         password: str,
         db_name: str,
         debug: bool = False,
+        page_compression: bool = False,
     ) -> None:
         self.host = host
         self.port = port
@@ -18,19 +140,114 @@ class MariaDB:
         self.password = password
         self.db_name = db_name
         self.debug = debug
+        self.page_compression = page_compression
+        # 业务读写复用一条持久连接（加锁串行使用），避免每次调用都重新握手
+        self._lock = threading.RLock()
+        self._con = None
+        # 分区轮换（DROP/REORGANIZE PARTITION）不可用（如账号缺少 ALTER 权限）时置为 False，之后仅用 DELETE 清理
+        self._rotation_ok = True
+        if debug:
+            logging.debug(f"数据库驱动: {DB_DRIVER}")
         self._ensure_db_and_tables()
 
     def _conn(self, db: Optional[str] = None):
-        return pymysql.connect(
+        kwargs = dict(
             host=self.host,
             port=self.port,
             user=self.user,
             password=self.password,
-            database=db or None,
             autocommit=True,
             charset="utf8mb4",
-            cursorclass=pymysql.cursors.DictCursor,
+            cursorclass=_drv.cursors.Cursor,  # 元组行，不为每行构造 dict；需要列名时用 query_named
+        )
+        if db:
+            kwargs["database"] = db
+        return _drv.connect(**kwargs)
+
+    @staticmethod
+    def _begin(con) -> None:
+        # 显式开启事务；经游标执行，PyMySQL 与 mysqlclient 行为一致
+        with con.cursor() as cur:
+            cur.execute("START TRANSACTION")
+
+    def _acquire(self):
+        # 调用方须持有 self._lock
+        if self._con is None or not self._con.open:
+            self._con = self._conn(self.db_name)
+        return self._con
+
+    def _drop(self) -> None:
+        # 调用方须持有 self._lock
+        con, self._con = self._con, None
+        if con is not None:
+            try:
+                con.close()
+            except Exception:
+                pass
+
+    def _run(self, fn):
+        """
+        在持久连接上执行 fn(con)；连接失效（如服务端 wait_timeout 断开）时重连并重试一次。
+        """
+        with self._lock:
+            try:
+                return fn(self._acquire())
+            except Exception as e:
+                if not _is_conn_lost(e):
+                    raise
+                if self.debug:
+                    logging.debug(f"DB 连接失效，重连后重试: {e}")
+                self._drop()
+                return fn(self._acquire())
+
+    def close(self) -> None:
+        with self._lock:
+            self._drop()
+
+    def _migrate_legacy_columns(self, cur) -> None:
+        """
+        旧版本以 FLOAT 存储 CPU 百分比与传感器读数；按列类型判断并转换为紧凑整数编码。
+        先把换算结果写入新列（<列名>_new），再用一条 ALTER 删除旧列并改名：旧列在最后一步之前保持原值，
+        中途失败或进程退出后，下次启动会从旧列重新换算，不会重复放大。
+        """
+        cur.execute(
+            "SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE FROM information_schema.COLUMNS"
+            " WHERE TABLE_SCHEMA = %s AND TABLE_NAME IN ('cpu_total', 'cpu_core', 'cpu_stats')",
+            (self.db_name,),
+        )
+        columns = {(tbl, col): dtype.lower() for tbl, col, dtype in cur.fetchall()}
+        for tbl, specs in _LEGACY_FLOAT_COLUMNS.items():
+            todo = [spec for spec in specs if columns.get((tbl, spec[0])) == "float"]
+            if not todo:
+                continue
+            logging.info(f"迁移 {tbl} 的 FLOAT 列为整数编码: {[col for col, _, _, _ in todo]}")
+            missing = [(col, new_type) for col, new_type, _, _ in todo if (tbl, f"{col}_new") not in columns]
+            if missing:
+                cur.execute(f"ALTER TABLE {tbl} " + ", ".join(f"ADD COLUMN {col}_new {new_type} NULL" for col, new_type in missing) + ";")
+            cur.execute(f"UPDATE {tbl} SET " + ", ".join(f"{col}_new = ROUND({expr})" for col, _, expr, _ in todo) + ";")
+            cur.execute(
+                f"ALTER TABLE {tbl} "
+                + ", ".join(f"DROP COLUMN {col}, CHANGE COLUMN {col}_new {col} {new_type} {null}" for col, new_type, _, null in todo)
+                + ";"
+            )
+
+    def _apply_page_compression(self, cur) -> None:
+        """
+        为时序表开启 InnoDB 页压缩；已开启的表跳过（ALTER 会重建表）。服务端不支持时仅告警。
+        """
+        cur.execute(
+            "SELECT TABLE_NAME, CREATE_OPTIONS FROM information_schema.TABLES"
+            " WHERE TABLE_SCHEMA = %s AND TABLE_NAME IN (" + ", ".join(["%s"] * len(_PARTITIONED_TABLES)) + ")",
+            (self.db_name, *_PARTITIONED_TABLES),
         )
+        for tbl, options in cur.fetchall():
+            if "page_compressed" in (options or "").lower():
+                continue
+            try:
+                cur.execute(f"ALTER TABLE {tbl} PAGE_COMPRESSED=1;")
+                logging.info(f"数据表 {tbl} 已启用页压缩")
+            except Exception as e:
+                logging.warning(f"数据表 {tbl} 启用页压缩失败（服务端可能不支持）: {e}")
 
     def _ensure_db_and_tables(self) -> None:
         try:
@@ -44,39 +261,44 @@ class MariaDB:
                     cur.execute("""
                         CREATE TABLE IF NOT EXISTS cpu_total (
                             ts DATETIME NOT NULL,
-                            percent FLOAT NOT NULL,
+                            percent SMALLINT UNSIGNED NOT NULL,
                             PRIMARY KEY (ts)
-                        ) ENGINE=InnoDB;
+                        ) ENGINE=InnoDB
+                        PARTITION BY RANGE (TO_SECONDS(ts)) (PARTITION pmax VALUES LESS THAN MAXVALUE);
                     """)
                     cur.execute("""
                         CREATE TABLE IF NOT EXISTS cpu_core (
                             ts DATETIME NOT NULL,
                             core_index INT NOT NULL,
-                            percent FLOAT NOT NULL,
+                            percent SMALLINT UNSIGNED NOT NULL,
                             PRIMARY KEY (ts, core_index)
-                        ) ENGINE=InnoDB;
+                        ) ENGINE=InnoDB
+                        PARTITION BY RANGE (TO_SECONDS(ts)) (PARTITION pmax VALUES LESS THAN MAXVALUE);
                     """)
                     cur.execute("""
                         CREATE TABLE IF NOT EXISTS cpu_stats (
                             ts DATETIME NOT NULL PRIMARY KEY,
-                            freq_mhz FLOAT,
-                            fan_rpm FLOAT,
-                            package_temp_c FLOAT
-                        ) ENGINE=InnoDB;
+                            freq_mhz SMALLINT UNSIGNED,
+                            fan_rpm SMALLINT UNSIGNED,
+                            package_temp_c TINYINT
+                        ) ENGINE=InnoDB
+                        PARTITION BY RANGE (TO_SECONDS(ts)) (PARTITION pmax VALUES LESS THAN MAXVALUE);
                     """)
                     cur.execute("""
                         CREATE TABLE IF NOT EXISTS net_io (
                             ts DATETIME NOT NULL PRIMARY KEY,
                             up_bps BIGINT,
                             down_bps BIGINT
-                        ) ENGINE=InnoDB;
+                        ) ENGINE=InnoDB
+                        PARTITION BY RANGE (TO_SECONDS(ts)) (PARTITION pmax VALUES LESS THAN MAXVALUE);
                     """)
                     cur.execute("""
                         CREATE TABLE IF NOT EXISTS disk_io (
                             ts DATETIME NOT NULL PRIMARY KEY,
                             read_bps BIGINT,
                             write_bps BIGINT
-                        ) ENGINE=InnoDB;
+                        ) ENGINE=InnoDB
+                        PARTITION BY RANGE (TO_SECONDS(ts)) (PARTITION pmax VALUES LESS THAN MAXVALUE);
                     """)
                     cur.execute("""
                         CREATE TABLE IF NOT EXISTS sys_info (
@@ -104,73 +326,265 @@ class MariaDB:
                             cpu_percent FLOAT,
                             mem_rss BIGINT,
                             PRIMARY KEY (ts, proc_name)
-                        ) ENGINE=InnoDB;
+                        ) ENGINE=InnoDB
+                        PARTITION BY RANGE (TO_SECONDS(ts)) (PARTITION pmax VALUES LESS THAN MAXVALUE);
                     """)
+                    self._migrate_legacy_columns(cur)
+                    self._partition_legacy_tables(cur)
+                    if self.page_compression:
+                        self._apply_page_compression(cur)
                     if self.debug:
                         logging.debug("Tables ensured")
         except Exception as e:
             logging.error(f"初始化数据库/表失败: {e}")
             raise
 
+    @contextmanager
+    def transaction(self) -> Iterator["pymysql.cursors.Cursor"]:
+        """
+        在同一连接上开启事务，退出时统一提交（异常时回滚）。
+        用于把每个采样周期的多条写入合并为一次往返与一次提交。
+        """
+        try:
+            with self._lock:
+                try:
+                    con = self._acquire()
+                    self._begin(con)
+                except Exception as e:
+                    if not _is_conn_lost(e):
+                        raise
+                    # 尚未执行任何语句，重连后重新开始事务是安全的
+                    self._drop()
+                    con = self._acquire()
+                    self._begin(con)
+                try:
+                    with con.cursor() as cur:
+                        yield cur
+                    con.commit()
+                except Exception as e:
+                    if _is_conn_lost(e):
+                        self._drop()
+                    else:
+                        con.rollback()
+                    raise
+                if self.debug:
+                    logging.debug("transaction committed")
+        except Exception as e:
+            logging.error(f"DB 事务失败: {e}")
+            raise
+
+    def insert_sample(self, batch: Dict[str, Tuple[str, List[Tuple]]]) -> None:
+        """
+        一个采样周期的全部写入：{表名: (sql, rows)}，在同一事务中逐表 executemany 后一次提交。
+        单表失败只记录日志，不影响其它表；连接中途失效时整批在新连接上重试一次。
+        调用方的语句均为 INSERT ... ON DUPLICATE KEY UPDATE，重放同一 ts 的数据是幂等的。
+        """
+        def _write_all() -> None:
+            with self.transaction() as cur:
+                for tbl, (sql, rows) in batch.items():
+                    if not rows:
+                        continue
+                    try:
+                        _execute_rows(cur, sql, rows)
+                        logging.debug(f"入库成功: {tbl}")
+                    except Exception as e:
+                        # 只有连接丢失才中止整批；其它服务端错误（如未知列、权限、死锁）只影响本表
+                        if _is_conn_lost(e):
+                            raise
+                        logging.error(f"入库失败: {tbl} - {e}")
+        try:
+            _write_all()
+        except Exception as e:
+            if not _is_conn_lost(e):
+                raise
+            if self.debug:
+                logging.debug(f"DB 连接失效，整批重试: {e}")
+            _write_all()
+
     def insert_many(self, sql: str, rows: List[Tuple]) -> None:
         if not rows:
             return
+        def _do(con):
+            with con.cursor() as cur:
+                rc = _execute_rows(cur, sql, rows)
+                if self.debug:
+                    logging.debug(f"insert_many rc={rc} rows_in={len(rows)}")
         try:
-            with self._conn(self.db_name) as con:
-                with con.cursor() as cur:
-                    cur.executemany(sql, rows)
-                    if self.debug:
-                        logging.debug(f"executemany rc={cur.rowcount} rows_in={len(rows)}")
+            self._run(_do)
         except Exception as e:
             logging.error(f"DB insert_many 失败: {e} sql={sql} rows={len(rows)}")
             raise
 
     def insert_one(self, sql: str, row: Tuple) -> None:
+        def _do(con):
+            with con.cursor() as cur:
+                cur.execute(sql, row)
+                if self.debug:
+                    logging.debug(f"execute rc={cur.rowcount}")
         try:
-            with self._conn(self.db_name) as con:
-                with con.cursor() as cur:
-                    cur.execute(sql, row)
-                    if self.debug:
-                        logging.debug(f"execute rc={cur.rowcount}")
+            self._run(_do)
         except Exception as e:
             logging.error(f"DB insert_one 失败: {e} sql={sql} row={row}")
             raise
 
-    def query(self, sql: str, params: Tuple = ()) -> List[Dict]:
+    def query(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        def _do(con):
+            with con.cursor() as cur:
+                cur.execute(sql, params)
+                rows = cur.fetchall()
+                if self.debug:
+                    logging.debug(f"query rows={len(rows)}")
+                return rows
         try:
-            with self._conn(self.db_name) as con:
-                with con.cursor() as cur:
-                    cur.execute(sql, params)
-                    rows = cur.fetchall()
-                    if self.debug:
-                        logging.debug(f"query rows={len(rows)}")
-                    return rows
+            return self._run(_do)
         except Exception as e:
             logging.error(f"DB query 失败: {e} sql={sql} params={params}")
             raise
 
+    def query_named(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        """
+        与 query 相同，但每行包装为 namedtuple（按列名访问）；类型按列名组合缓存，只对需要列名的调用方付出开销。
+        """
+        def _do(con):
+            with con.cursor() as cur:
+                cur.execute(sql, params)
+                rows = cur.fetchall()
+                if not cur.description:
+                    return []
+                row_type = _row_type(tuple(d[0] for d in cur.description))
+                return [row_type._make(r) for r in rows]
+        try:
+            return self._run(_do)
+        except Exception as e:
+            logging.error(f"DB query_named 失败: {e} sql={sql} params={params}")
+            raise
+
+    def query_iter(self, sql: str, params: Tuple = (), batch: int = 1000) -> Iterator[Tuple]:
+        """
+        以无缓冲游标（SSCursor）逐批读取结果，按元组产出，不为每行构造 dict，也不一次性载入全部结果。
+        迭代期间独占持久连接，调用方应尽快消费完毕。
+        """
+        with self._lock:
+            try:
+                con = self._acquire()
+                with con.cursor(_drv.cursors.SSCursor) as cur:
+                    cur.execute(sql, params)
+                    while True:
+                        rows = cur.fetchmany(batch)
+                        if not rows:
+                            break
+                        yield from rows
+            except Exception as e:
+                if _is_conn_lost(e):
+                    self._drop()
+                logging.error(f"DB query_iter 失败: {e} sql={sql} params={params}")
+                raise
+
     def wipe_all(self) -> None:
+        def _do(con):
+            with con.cursor() as cur:
+                for tbl in _ALL_TABLES:
+                    cur.execute(f"TRUNCATE TABLE {tbl};")
+                if self.debug:
+                    logging.debug("All tables truncated")
         try:
-            with self._conn(self.db_name) as con:
-                with con.cursor() as cur:
-                    for tbl in ["cpu_total", "cpu_core", "cpu_stats", "net_io", "disk_io", "sys_info", "sw_versions", "process_status"]:
-                        cur.execute(f"TRUNCATE TABLE {tbl};")
-                    if self.debug:
-                        logging.debug("All tables truncated")
+            self._run(_do)
         except Exception as e:
             logging.error(f"TRUNCATE 失败: {e}")
             raise
 
+    def _partition_bounds(self, cur) -> Dict[str, Optional[List[Tuple[str, int]]]]:
+        """
+        返回 {表名: [(分区名, 上界 TO_SECONDS 值), ...]}（不含 MAXVALUE 分区）；未分区的表为 None。
+        """
+        cur.execute(
+            "SELECT TABLE_NAME, PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS"
+            " WHERE TABLE_SCHEMA = %s AND TABLE_NAME IN (" + ", ".join(["%s"] * len(_PARTITIONED_TABLES)) + ")",
+            (self.db_name, *_PARTITIONED_TABLES),
+        )
+        result: Dict[str, Optional[List[Tuple[str, int]]]] = {}
+        for tbl, name, desc in cur.fetchall():
+            if name is None:
+                result[tbl] = None
+                continue
+            bounds = result.setdefault(tbl, [])
+            if bounds is not None and desc and desc.upper() != "MAXVALUE":
+                bounds.append((name, int(desc)))
+        return result
+
+    def _partition_legacy_tables(self, cur) -> None:
+        """
+        一次性迁移：旧版本创建的未分区时序表在启动时转换为分区表（会重建整表）。
+        失败时仅告警，这些表之后由 DELETE 清理，轮换时跳过。
+        """
+        try:
+            legacy = [tbl for tbl, bounds in self._partition_bounds(cur).items() if bounds is None]
+        except Exception as e:
+            logging.warning(f"读取分区信息失败，跳过分区迁移: {e}")
+            return
+        for tbl in legacy:
+            logging.info(f"一次性迁移：将数据表 {tbl} 转换为按时间分区（重建整表，数据量大时耗时较长）")
+            try:
+                cur.execute(f"ALTER TABLE {tbl} PARTITION BY RANGE (TO_SECONDS(ts)) (PARTITION pmax VALUES LESS THAN MAXVALUE);")
+            except Exception as e:
+                logging.warning(f"数据表 {tbl} 分区迁移失败，保留未分区表并使用 DELETE 清理: {e}")
+
+    def _rotate_partitions(self, cur, minutes: int, now: datetime.datetime) -> None:
+        """
+        删除上界不晚于截止时间的分区，并在 pmax 前预建后续分区。
+        未分区的表（启动时迁移失败）跳过，由 DELETE 清理。
+        """
+        cutoff = _to_seconds(now - datetime.timedelta(minutes=minutes))
+        span = _partition_span_seconds(minutes)
+        first_new = (_to_seconds(now) // span + 1) * span
+        targets = [first_new + i * span for i in range(_PARTITIONS_AHEAD)]
+        all_bounds = self._partition_bounds(cur)
+        for tbl in _PARTITIONED_TABLES:
+            bounds = all_bounds.get(tbl)
+            if bounds is None:
+                continue
+            expired = [name for name, bound in bounds if bound <= cutoff]
+            if expired:
+                cur.execute(f"ALTER TABLE {tbl} DROP PARTITION " + ", ".join(f"`{n}`" for n in expired) + ";")
+                if self.debug:
+                    logging.debug(f"purge({minutes}m) {tbl} dropped partitions={expired}")
+            last = max((bound for _, bound in bounds), default=None)
+            new_bounds = [b for b in targets if last is None or b > last]
+            if new_bounds:
+                parts = ", ".join(f"PARTITION `{_partition_name(b)}` VALUES LESS THAN ({b})" for b in new_bounds)
+                cur.execute(f"ALTER TABLE {tbl} REORGANIZE PARTITION pmax INTO ({parts}, PARTITION pmax VALUES LESS THAN MAXVALUE);")
+
     def purge_older_than(self, minutes: int) -> None:
         if minutes is None or minutes <= 0:
             return
+        # 截止时间在 Python 侧只算一次（与写入的 ts 同源），各表、各批次共用同一个参数
+        now = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+        cutoff = now - datetime.timedelta(minutes=int(minutes))
+        def _do(con):
+            with con.cursor() as cur:
+                # 整分区过期的数据直接 DROP；跨越截止时间的分区与小表再用 DELETE（按分区裁剪，只触及少量行）
+                # 轮换失败（非连接丢失）不影响下面的 DELETE：记录一次后停用轮换，保留期仍由 DELETE 保证
+                if self._rotation_ok:
+                    try:
+                        self._rotate_partitions(cur, int(minutes), now)
+                    except Exception as e:
+                        if _is_conn_lost(e):
+                            raise
+                        self._rotation_ok = False
+                        logging.warning(f"分区轮换失败，之后仅使用 DELETE 清理过期数据: {e}")
+                for tbl in _ALL_TABLES:
+                    # 沿主键 ts 从最旧处按批删除（autocommit 下每批独立提交），单批锁定的行与 undo 量都很小
+                    sql = f"DELETE FROM {tbl} WHERE ts < %s ORDER BY ts LIMIT {_PURGE_BATCH_ROWS};"
+                    total = 0
+                    while True:
+                        cur.execute(sql, (cutoff,))
+                        total += cur.rowcount
+                        if cur.rowcount < _PURGE_BATCH_ROWS:
+                            break
+                    if self.debug:
+                        logging.debug(f"purge({minutes}m) {tbl} rc={total}")
         try:
-            with self._conn(self.db_name) as con:
-                with con.cursor() as cur:
-                    for tbl in ["cpu_total", "cpu_core", "cpu_stats", "net_io", "disk_io", "sys_info", "sw_versions", "process_status"]:
-                        cur.execute(f"DELETE FROM {tbl} WHERE ts < (UTC_TIMESTAMP() - INTERVAL {int(minutes)} MINUTE);")
-                        if self.debug:
-                            logging.debug(f"purge({minutes}m) {tbl} rc={cur.rowcount}")
+            self._run(_do)
         except Exception as e:
             logging.error(f"数据清理失败({minutes}m): {e}")
             raise
\ No newline at end of file
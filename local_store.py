@@ -0,0 +1,129 @@
+﻿import array
+import datetime
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Iterator, List, Tuple
+
+from database import decode_pct, encode_pct
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+def _to_epoch(dt: datetime.datetime) -> int:
+    # ts 为 naive UTC
+    return int((dt - _EPOCH).total_seconds())
+
+def _encode_ts(ts: List[int]) -> bytes:
+    # delta-of-delta：采样周期固定时几乎全为 0，压缩后每块只有几十字节（首个时间戳单独存列）
+    out = array.array("i")
+    prev_t, prev_d = ts[0], 0
+    for t in ts[1:]:
+        d = t - prev_t
+        out.append(d - prev_d)
+        prev_t, prev_d = t, d
+    return zlib.compress(out.tobytes())
+
+def _decode_ts(t0: int, blob: bytes) -> List[int]:
+    dods = array.array("i")
+    dods.frombytes(zlib.decompress(blob))
+    ts = [t0]
+    d = 0
+    for dod in dods:
+        d += dod
+        ts.append(ts[-1] + d)
+    return ts
+
+class LocalStore:
+    """
+    未启用数据库时的本地时序存储（标准库 sqlite3，无需额外依赖）。
+    CPU 总占用按块缓存，每满 chunk_size 个样本写入一行：时间戳做 delta-of-delta 编码，
+    占用率按 ×10 存为 uint16，两列各自 zlib 压缩；过期数据按块整行删除。
+    """
+
+    def __init__(self, path: str, chunk_size: int = 60, debug: bool = False) -> None:
+        self.path = path
+        self.chunk_size = max(1, chunk_size)
+        self.debug = debug
+        self._lock = threading.Lock()
+        self._ts: List[int] = []
+        self._pct = array.array("H")
+        # 启动时在主线程读取历史，之后由写入线程追加，故关闭同线程检查并自行加锁
+        self._con = sqlite3.connect(path, check_same_thread=False)
+        self._con.execute(
+            "CREATE TABLE IF NOT EXISTS cpu_total_chunk ("
+            " t0 INTEGER PRIMARY KEY,"
+            " t_end INTEGER NOT NULL,"
+            " n INTEGER NOT NULL,"
+            " ts_blob BLOB NOT NULL,"
+            " pct_blob BLOB NOT NULL)"
+        )
+        self._con.commit()
+
+    def append(self, ts: datetime.datetime, percent: float) -> None:
+        with self._lock:
+            self._ts.append(_to_epoch(ts))
+            self._pct.append(encode_pct(percent))
+            if len(self._ts) >= self.chunk_size:
+                self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._ts:
+            return
+        ts, pct = self._ts, self._pct
+        self._ts, self._pct = [], array.array("H")
+        try:
+            self._con.execute(
+                "INSERT OR REPLACE INTO cpu_total_chunk (t0, t_end, n, ts_blob, pct_blob) VALUES (?, ?, ?, ?, ?)",
+                (ts[0], ts[-1], len(ts), _encode_ts(ts), zlib.compress(pct.tobytes())),
+            )
+            self._con.commit()
+            if self.debug:
+                logging.debug(f"本地存储写入数据块: n={len(ts)}")
+        except Exception as e:
+            logging.error(f"本地存储写入失败: {e}")
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def iter_since(self, since: datetime.datetime) -> Iterator[Tuple[datetime.datetime, float]]:
+        """按时间升序产出 since 之后的 (ts, percent)，包含尚未落盘的缓存样本。"""
+        cutoff = _to_epoch(since)
+        with self._lock:
+            rows = self._con.execute(
+                "SELECT t0, ts_blob, pct_blob FROM cpu_total_chunk WHERE t_end >= ? ORDER BY t0",
+                (cutoff,),
+            ).fetchall()
+            pending = list(zip(self._ts, self._pct))
+        for t0, ts_blob, pct_blob in rows:
+            pct = array.array("H")
+            pct.frombytes(zlib.decompress(pct_blob))
+            for t, v in zip(_decode_ts(t0, ts_blob), pct):
+                if t >= cutoff:
+                    yield _EPOCH + datetime.timedelta(seconds=t), decode_pct(v)
+        for t, v in pending:
+            if t >= cutoff:
+                yield _EPOCH + datetime.timedelta(seconds=t), decode_pct(v)
+
+    def purge_older_than(self, minutes: int) -> None:
+        # 整块删除：块内最新样本也已过期才删，块的粒度即保留精度
+        cutoff = int(time.time()) - minutes * 60
+        with self._lock:
+            self._con.execute("DELETE FROM cpu_total_chunk WHERE t_end < ?", (cutoff,))
+            self._con.commit()
+
+    def wipe_all(self) -> None:
+        with self._lock:
+            self._ts, self._pct = [], array.array("H")
+            self._con.execute("DELETE FROM cpu_total_chunk")
+            self._con.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_locked()
+            try:
+                self._con.close()
+            except Exception:
+                pass
@@ -1,8 +1,12 @@
 ﻿import ctypes
+import ctypes.util
+import functools
 import logging
-import platform
+import os
 from typing import Optional, Tuple, List
 
+_IS_WINDOWS = os.name == "nt"
+
 # =========================
 # NVML（NVIDIA 驱动 API）轻量封装
 # =========================
@@ -18,61 +22,111 @@ class NVMLHelper:
         self.debug = debug
         self._lib = None
         self._initialized = False
+        self._handles: Optional[List[ctypes.c_void_p]] = None  # 设备句柄缓存（初始化期间有效）
+        # 每个设备一块显存信息输出缓冲区（连续的结构体数组），与句柄一同创建，跨调用复用
+        self._mem_buf = (_nvmlMemory_t * 0)()
+        self._mem_calls: List[Tuple[ctypes.c_void_p, object]] = []  # (句柄, 对应缓冲区的 byref)
         self._load_lib()
 
+    @staticmethod
+    def _lib_candidates() -> List[str]:
+        # 按显式路径依次尝试，避免依赖 DLL 搜索顺序（只探测一次）
+        if _IS_WINDOWS:
+            sys_root = os.environ.get("SystemRoot", r"C:\Windows")
+            prog = os.environ.get("ProgramFiles", r"C:\Program Files")
+            return [
+                os.path.join(sys_root, "System32", "nvml.dll"),
+                os.path.join(prog, "NVIDIA Corporation", "NVSMI", "nvml.dll"),
+                "nvml",
+            ]
+        found = ctypes.util.find_library("nvidia-ml")
+        return [n for n in (found, "libnvidia-ml.so.1") if n]
+
     def _load_lib(self):
-        if platform.system().lower() == "windows":
+        for path in self._lib_candidates():
+            if os.path.isabs(path) and not os.path.isfile(path):
+                continue
             try:
-                self._lib = ctypes.WinDLL("nvml", use_last_error=True)
+                if _IS_WINDOWS:
+                    self._lib = ctypes.WinDLL(path, use_last_error=True)
+                else:
+                    self._lib = ctypes.CDLL(path)
+                if self.debug:
+                    logging.debug(f"NVML loaded: {path}")
+                return
             except Exception:
-                self._lib = None
-        else:
+                continue
+        self._lib = None
+
+    # 绑定函数（尽量兼容 *_v2 与旧符号）；首次使用时才解析符号并缓存，未加载库时为 None
+    def _bind(self, name_alt: List[str], restype, argtypes=None):
+        if self._lib is None:
+            return None
+        for n in name_alt:
             try:
-                self._lib = ctypes.CDLL("libnvidia-ml.so.1")
+                fn = getattr(self._lib, n)
+                fn.restype = restype
+                if argtypes is not None:
+                    fn.argtypes = argtypes
+                return fn
             except Exception:
-                self._lib = None
-        if not self._lib:
-            return
-        # 绑定函数（尽量兼容 *_v2 与旧符号）
-        def _bind(name_alt: List[str], restype, argtypes=None):
-            for n in name_alt:
-                try:
-                    fn = getattr(self._lib, n)
-                    fn.restype = restype
-                    if argtypes is not None:
-                        fn.argtypes = argtypes
-                    return fn
-                except Exception:
-                    continue
-            return None
+                continue
+        return None
 
-        self.nvmlInit = _bind(["nvmlInit_v2", "nvmlInit"], ctypes.c_int, [])
-        self.nvmlShutdown = _bind(["nvmlShutdown"], ctypes.c_int, [])
-        self.nvmlDeviceGetCount = _bind(["nvmlDeviceGetCount_v2", "nvmlDeviceGetCount"], ctypes.c_int, [ctypes.POINTER(ctypes.c_uint)])
-        self.nvmlDeviceGetHandleByIndex = _bind(["nvmlDeviceGetHandleByIndex_v2", "nvmlDeviceGetHandleByIndex"], ctypes.c_int, [ctypes.c_uint, ctypes.POINTER(ctypes.c_void_p)])
-        self.nvmlDeviceGetMemoryInfo = _bind(["nvmlDeviceGetMemoryInfo"], ctypes.c_int, [ctypes.c_void_p, ctypes.POINTER(_nvmlMemory_t)])
-        self.nvmlSystemGetCudaDriverVersion = _bind(["nvmlSystemGetCudaDriverVersion_v2", "nvmlSystemGetCudaDriverVersion"], ctypes.c_int, [ctypes.POINTER(ctypes.c_int)])
-        self.nvmlErrorString = _bind(["nvmlErrorString"], ctypes.c_char_p, [ctypes.c_int])
+    @functools.cached_property
+    def nvmlInit(self):
+        return self._bind(["nvmlInit_v2", "nvmlInit"], ctypes.c_int, [])
+
+    @functools.cached_property
+    def nvmlShutdown(self):
+        return self._bind(["nvmlShutdown"], ctypes.c_int, [])
+
+    @functools.cached_property
+    def nvmlDeviceGetCount(self):
+        return self._bind(["nvmlDeviceGetCount_v2", "nvmlDeviceGetCount"], ctypes.c_int, [ctypes.POINTER(ctypes.c_uint)])
+
+    @functools.cached_property
+    def nvmlDeviceGetHandleByIndex(self):
+        return self._bind(["nvmlDeviceGetHandleByIndex_v2", "nvmlDeviceGetHandleByIndex"], ctypes.c_int, [ctypes.c_uint, ctypes.POINTER(ctypes.c_void_p)])
+
+    @functools.cached_property
+    def nvmlDeviceGetMemoryInfo(self):
+        return self._bind(["nvmlDeviceGetMemoryInfo"], ctypes.c_int, [ctypes.c_void_p, ctypes.POINTER(_nvmlMemory_t)])
+
+    @functools.cached_property
+    def nvmlSystemGetCudaDriverVersion(self):
+        return self._bind(["nvmlSystemGetCudaDriverVersion_v2", "nvmlSystemGetCudaDriverVersion"], ctypes.c_int, [ctypes.POINTER(ctypes.c_int)])
+
+    @functools.cached_property
+    def nvmlErrorString(self):
+        return self._bind(["nvmlErrorString"], ctypes.c_char_p, [ctypes.c_int])
 
     def available(self) -> bool:
-        return self._lib is not None and self.nvmlInit is not None
+        # 只判断库是否加载，不触发符号解析；nvmlInit 在 init() 首次调用时才解析
+        return self._lib is not None
 
     def _check(self, rc: int, ctx: str) -> bool:
         if rc == 0:
             return True
+        self._log_err(rc, ctx)
+        return False
+
+    def _log_err(self, rc: int, ctx: str) -> None:
+        # 仅在 rc != 0 时调用；热路径上直接内联判断 rc，成功时不进入任何额外函数
         if self.debug:
             try:
                 err = self.nvmlErrorString(rc) if self.nvmlErrorString else None
                 logging.debug(f"NVML {ctx} failed rc={rc} msg={(err.decode('utf-8') if err else 'N/A')}")
             except Exception:
                 logging.debug(f"NVML {ctx} failed rc={rc}")
-        return False
 
     def init(self) -> bool:
         if not self.available():
             return False
         if self._initialized:
             return True
+        if self.nvmlInit is None:
+            return False
         rc = self.nvmlInit()
         ok = self._check(rc, "Init")
         self._initialized = ok
@@ -86,6 +140,7 @@ class NVMLHelper:
             self._check(rc, "Shutdown")
         finally:
             self._initialized = False
+            self._handles = None
 
     def cuda_driver_version_str(self) -> Optional[str]:
         if not self.init():
@@ -102,31 +157,50 @@ class NVMLHelper:
         minor = (ival % 1000) // 10
         return f"{major}.{minor}"
 
-    def gpu_mem_sum(self) -> Tuple[Optional[int], Optional[int]]:
+    def _device_handles(self) -> Optional[List[ctypes.c_void_p]]:
         """
-        返回 (used_bytes_sum, total_bytes_sum)
+        枚举一次设备句柄并缓存；句柄在 nvmlShutdown 之前一直有效。
         """
-        if not self.init():
-            return None, None
-        if not (self.nvmlDeviceGetCount and self.nvmlDeviceGetHandleByIndex and self.nvmlDeviceGetMemoryInfo):
-            return None, None
+        if self._handles is not None:
+            return self._handles
         cnt = ctypes.c_uint(0)
         rc = self.nvmlDeviceGetCount(ctypes.byref(cnt))
         if not self._check(rc, "DeviceGetCount"):
-            return None, None
-        total = 0
-        used = 0
+            return None
+        handles: List[ctypes.c_void_p] = []
         for i in range(int(cnt.value)):
             h = ctypes.c_void_p()
             rc = self.nvmlDeviceGetHandleByIndex(ctypes.c_uint(i), ctypes.byref(h))
             if not self._check(rc, f"DeviceGetHandleByIndex({i})"):
                 continue
-            mem = _nvmlMemory_t()
-            rc = self.nvmlDeviceGetMemoryInfo(h, ctypes.byref(mem))
-            if not self._check(rc, f"DeviceGetMemoryInfo({i})"):
-                continue
-            total += int(mem.total)
-            used += int(mem.used)
+            handles.append(h)
+        self._handles = handles
+        self._mem_buf = (_nvmlMemory_t * len(handles))()
+        self._mem_calls = [(h, ctypes.byref(m)) for h, m in zip(handles, self._mem_buf)]
+        return handles
+
+    def gpu_mem_sum(self) -> Tuple[Optional[int], Optional[int]]:
+        """
+        返回 (used_bytes_sum, total_bytes_sum)
+        """
+        if not self.init():
+            return None, None
+        if not (self.nvmlDeviceGetCount and self.nvmlDeviceGetHandleByIndex and self.nvmlDeviceGetMemoryInfo):
+            return None, None
+        handles = self._device_handles()
+        if handles is None:
+            return None, None
+        buf = self._mem_buf
+        get_memory_info = self.nvmlDeviceGetMemoryInfo
+        for i, (h, mem_ref) in enumerate(self._mem_calls):
+            rc = get_memory_info(h, mem_ref)
+            if rc:
+                self._log_err(rc, f"DeviceGetMemoryInfo({i})")
+                self._handles = None  # 设备可能已掉线，下次重新枚举
+                ctypes.memset(mem_ref, 0, ctypes.sizeof(_nvmlMemory_t))  # 不计入上次的旧值
+        # 逐设备调用后在结构体数组上一次性求和
+        total = sum(m.total for m in buf)
+        used = sum(m.used for m in buf)
         if total == 0:
             return None, None
         return used, total
@@ -294,7 +294,14 @@
         }
 
 
+        // 启动时写出一次的静态部分（dashboard.static.js）与每周期的 data.js 合并
+        function withStatic(d) {
+            const st = window.__DASHBOARD_STATIC__ || {};
+            return Object.assign({}, st, d, { sys_info: Object.assign({}, st.sys_info, d.sys_info) });
+        }
+
         function applyData(d) {
+            d = withStatic(d);
             LATEST = d;
             renderChart(d);
             renderBars(d, (d.gauge_prefs || {}).thresholds || [50, 80, 95]);